@@ -1,17 +1,75 @@
 #!/usr/bin/env python3
-from fastapi import FastAPI, Query
+import threading
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Query, HTTPException, Response
 from pydantic import BaseModel
-from typing import Optional, Literal
-from .dal import get_conn, summary as q_summary, timeseries as q_timeseries, top_campaigns as q_top_campaigns
+from typing import Optional, Literal, List
+from .dal import get_conn, summary as q_summary, timeseries as q_timeseries, top_campaigns_sourced as q_top_campaigns
 from .dal import bounds as q_bounds   # <--- add this import
+from .dal import breakdown as q_breakdown, compare as q_compare, data_version as q_data_version
+from .dal import cached as q_cached, warm_up as q_warm_up, PARTITIONED
+from ..utils.partitions import start_pool, shutdown_pools
+from .downsample import downsample_points
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI(title="Ads Metrics API", version="1.0.0")
+# Warm-up retry backoff: 0.5s, 1s, 2s, ... capped at WARMUP_MAX_DELAY
+WARMUP_BASE_DELAY = 0.5
+WARMUP_MAX_DELAY = 30.0
+
+def _warm_up(app: FastAPI, t0: float, stop: threading.Event):
+    # Keep retrying (e.g. the DB isn't built yet); /ready reports the last failure meanwhile
+    attempt = 0
+    while not stop.is_set():
+        attempt += 1
+        app.state.warmup_attempts = attempt
+        try:
+            app.state.warmup = q_warm_up()
+        except Exception as e:
+            app.state.warmup_error = f"{type(e).__name__}: {e}"
+            stop.wait(min(WARMUP_MAX_DELAY, WARMUP_BASE_DELAY * 2 ** (attempt - 1)))
+            continue
+        app.state.warmup_error = None
+        app.state.ready = True
+        app.state.startup_seconds = round(time.perf_counter() - t0, 4)
+        return
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: /health answers at once, /ready flips when done
+    app.state.ready = False
+    app.state.warmup = None
+    app.state.warmup_attempts = 0
+    app.state.warmup_error = None
+    app.state.startup_seconds = None
+    stop = threading.Event()
+    if PARTITIONED:
+        # Start the partition scan pool before any request thread exists
+        start_pool()
+    threading.Thread(target=_warm_up, args=(app, time.perf_counter(), stop), daemon=True).start()
+    yield
+    stop.set()
+    if PARTITIONED:
+        shutdown_pools()
+
+app = FastAPI(title="Ads Metrics API", version="1.0.0", lifespan=lifespan)
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready(response: Response):
+    if not app.state.ready:
+        response.status_code = 503
+    return {
+        "status": "ready" if app.state.ready else "warming",
+        "startup_seconds": app.state.startup_seconds,
+        "warmup": app.state.warmup,
+        "warmup_attempts": app.state.warmup_attempts,
+        "last_error": app.state.warmup_error,
+    }
+
 
 class SummaryResponse(BaseModel):
     start: str
@@ -33,19 +91,29 @@ def metrics_summary(
     platform: Literal["google", "meta", "all"] = "all"
 ):
     with get_conn() as conn:
-        return q_summary(conn, start, end, platform)
+        return q_cached(conn, q_summary, start, end, platform)
 
 @app.get("/metrics/timeseries")
 def metrics_timeseries(
     start: Optional[str] = Query(None),
     end: Optional[str]   = Query(None),
-    platform: Literal["google", "meta", "all"] = "all"
+    platform: Literal["google", "meta", "all"] = "all",
+    rolling: List[int] = Query([], description="Rolling window sizes in days, e.g. rolling=7&rolling=28"),
+    cumulative: bool = Query(False, description="Add cumulative-to-date columns"),
+    max_points: Optional[int] = Query(None, ge=3, le=100000, description="LTTB-downsample to at most this many points")
 ):
     with get_conn() as conn:
-        return q_timeseries(conn, start, end, platform)
+        try:
+            points = q_timeseries(conn, start, end, platform, rolling, cumulative)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if max_points:
+        points = downsample_points(points, max_points)
+    return points
 
 @app.get("/metrics/top-campaigns")
 def metrics_top_campaigns(
+    response: Response,
     start: Optional[str] = Query(None),
     end: Optional[str]   = Query(None),
     platform: Literal["google", "meta", "all"] = "all",
@@ -53,9 +121,52 @@ def metrics_top_campaigns(
     sort: Literal["roas", "spend", "revenue", "conversions"] = "roas"
 ):
     with get_conn() as conn:
-        return q_top_campaigns(conn, start, end, platform, limit, sort)
+        rows, source = q_top_campaigns(conn, start, end, platform, limit, sort)
+    # precomputed | partitions | monthly_merge
+    response.headers["X-Leaderboard-Source"] = source
+    return rows
 
 @app.get("/metrics/bounds")
 def metrics_bounds(platform: Literal["google", "meta", "all"] = "all"):
     with get_conn() as conn:
-        return q_bounds(conn, platform)
+        return q_cached(conn, q_bounds, platform)
+
+@app.get("/metrics/version")
+def metrics_version():
+    with get_conn() as conn:
+        return q_data_version(conn)
+
+@app.get("/metrics/breakdown")
+def metrics_breakdown(
+    start: Optional[str] = Query(None),
+    end: Optional[str]   = Query(None),
+    platform: Literal["google", "meta", "all"] = "all",
+    level: Literal["campaign", "ad_group", "ad"] = "campaign",
+    campaign_id: Optional[str] = Query(None, description="Parent filter for ad_group/ad levels"),
+    ad_group_id: Optional[str] = Query(None, description="Parent filter for ad level"),
+    sort: Literal["roas", "spend", "revenue", "conversions", "clicks", "impressions"] = "spend",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
+    with get_conn() as conn:
+        try:
+            return q_breakdown(conn, start, end, platform, level, campaign_id, ad_group_id,
+                               sort, order, limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics/compare")
+def metrics_compare(
+    start: Optional[str] = Query(None),
+    end: Optional[str]   = Query(None),
+    platform: Literal["google", "meta", "all"] = "all",
+    baseline: Literal["previous", "year_ago"] = "previous",
+    limit: int = Query(10, ge=1, le=100),
+    sort: Literal["roas", "spend", "revenue", "conversions"] = "revenue"
+):
+    with get_conn() as conn:
+        try:
+            return q_compare(conn, start, end, platform, baseline, limit, sort)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
@@ -1,36 +1,125 @@
+import os
+import queue
 import sqlite3
+import json
+import base64
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 
+from ..utils.partitions import (PARTITION_ROLLUP, has_catalog, prune_partitions, fan_out, merge_sums,
+                                stale_partitions)
+
 DB_PATH = "data/ads_performance.db"
 
+# Opt-in: answer summary/top-campaigns by fanning out over the month partitions
+PARTITIONED = os.getenv("ADS_PARTITIONED", "0") == "1"
+
+POOL_SIZE = int(os.getenv("ADS_DB_POOL_SIZE", "8"))
+
+# Pooled read-only connections: each keeps its parsed schema, statement cache and page cache
+_pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    conn.execute("PRAGMA query_only = ON;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -65536;")     # 64 MiB page cache per connection
+    conn.execute("PRAGMA mmap_size = 268435456;")   # 256 MiB memory-mapped reads
+    return conn
+
+@contextmanager
 def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    finally:
+        if _pool.qsize() < POOL_SIZE:
+            _pool.put(conn)
+        else:
+            conn.close()
+
+def prime_pool(size: int = POOL_SIZE) -> int:
+    """Open connections up to `size` and parse the schema on each."""
+    conns = []
+    for _ in range(size - _pool.qsize()):
+        conn = _connect()
+        conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        conns.append(conn)
+    for conn in conns:
+        _pool.put(conn)
+    return _pool.qsize()
 
-def _date_bounds(conn, platform: Optional[str]) -> Tuple[str, str]:
+def _date_bounds(conn, platform: Optional[str], table: str = "v_all_metrics_daily") -> Tuple[str, str]:
     where = "" if not platform or platform == "all" else "WHERE platform = ?"
     params = [] if not platform or platform == "all" else [platform]
-    cur = conn.execute(f"SELECT MIN(date), MAX(date) FROM v_all_metrics_daily {where}", params)
+    cur = conn.execute(f"SELECT MIN(date), MAX(date) FROM {table} {where}", params)
     row = cur.fetchone()
     return row[0], row[1]
 
+# (platform, month) pairs the catalog doesn't match, recomputed once per data version
+_stale_version: Optional[str] = None
+_stale_months: Optional[set] = None
+_stale_lock = threading.Lock()
+
+def _stale(conn) -> Optional[set]:
+    """Stale (platform, month) pairs, or None if the catalog can't be checked."""
+    global _stale_version, _stale_months
+    version = data_version(conn)["data_version"]
+    with _stale_lock:
+        if version is not None and version == _stale_version:
+            return _stale_months
+    try:
+        months = {(p, m) for p, m, _ in stale_partitions(conn)}
+    except sqlite3.OperationalError:  # catalog predates source_rows
+        months = None
+    with _stale_lock:
+        _stale_version, _stale_months = version, months
+    return months
+
+def _partitions(conn, start: str, end: str, platform: str):
+    """Partitions for the range, or None to query the main DB (off, or catalog stale for the range)."""
+    if not PARTITIONED or not start or not end or not has_catalog(conn):
+        return None
+    stale = _stale(conn)
+    if stale is None or any((platform == "all" or p == platform) and start[:7] <= m <= end[:7]
+                            for p, m in stale):
+        return None
+    return prune_partitions(conn, start, end, platform, str(Path(DB_PATH).resolve().parent))
+
 def summary(conn, start: Optional[str], end: Optional[str], platform: str) -> Dict[str, Any]:
     if not start or not end:
         s, e = _date_bounds(conn, platform)
         start = start or s
         end = end or e
 
-    sql = """
-    SELECT
-      SUM(impressions),
-      SUM(clicks),
-      SUM(spend_usd),
-      SUM(conversions),
-      SUM(revenue_usd)
-    FROM v_all_metrics_daily
-    WHERE date BETWEEN ? AND ?
-      AND (? = 'all' OR platform = ?);
-    """
-    row = conn.execute(sql, [start, end, platform, platform]).fetchone()
+    parts = _partitions(conn, start, end, platform)
+    if parts is not None:
+        sql = f"""
+        SELECT SUM(impressions), SUM(clicks), SUM(spend_usd), SUM(conversions), SUM(revenue_usd)
+        FROM {PARTITION_ROLLUP}
+        WHERE date BETWEEN ? AND ?;
+        """
+        row = merge_sums(fan_out(parts, sql, [start, end]), 0).get((), [0] * 5)
+    else:
+        sql = """
+        SELECT
+          SUM(impressions),
+          SUM(clicks),
+          SUM(spend_usd),
+          SUM(conversions),
+          SUM(revenue_usd)
+        FROM v_all_metrics_daily
+        WHERE date BETWEEN ? AND ?
+          AND (? = 'all' OR platform = ?);
+        """
+        row = conn.execute(sql, [start, end, platform, platform]).fetchone()
     impressions, clicks, spend, conversions, revenue = [x or 0 for x in row]
 
     cpc  = (spend / clicks) if clicks else 0
@@ -49,33 +138,82 @@ def summary(conn, start: Optional[str], end: Optional[str], platform: str) -> Di
         "roas": round(roas, 4),
     }
 
-def timeseries(conn, start: Optional[str], end: Optional[str], platform: str) -> List[Dict[str, Any]]:
+_ROLLING_MAX = 365
+
+def _rolling_sql(windows: List[int]) -> Tuple[List[str], List[str]]:
+    cols, defs = [], []
+    for w in windows:
+        cols += [
+            f"AVG(spend_usd) OVER w{w}   AS spend_usd_avg_{w}d",
+            f"AVG(revenue_usd) OVER w{w} AS revenue_usd_avg_{w}d",
+            f"AVG(conversions) OVER w{w} AS conversions_avg_{w}d",
+            f"CASE WHEN SUM(spend_usd) OVER w{w} > 0 "
+            f"THEN SUM(revenue_usd) OVER w{w} / SUM(spend_usd) OVER w{w} ELSE 0 END AS roas_{w}d",
+        ]
+        # RANGE over the julian day so a missing date doesn't stretch the window
+        defs.append(f"w{w} AS (ORDER BY day_num RANGE BETWEEN {w - 1} PRECEDING AND CURRENT ROW)")
+    return cols, defs
+
+_CUMULATIVE_SQL = [
+    "SUM(CASE WHEN date >= :start THEN spend_usd ELSE 0 END) OVER wcum   AS spend_usd_cum",
+    "SUM(CASE WHEN date >= :start THEN revenue_usd ELSE 0 END) OVER wcum AS revenue_usd_cum",
+    "SUM(CASE WHEN date >= :start THEN conversions ELSE 0 END) OVER wcum AS conversions_cum",
+]
+
+def timeseries(conn, start: Optional[str], end: Optional[str], platform: str,
+               rolling: Optional[List[int]] = None, cumulative: bool = False) -> List[Dict[str, Any]]:
     if not start or not end:
-        s, e = _date_bounds(conn, platform)
+        s, e = _date_bounds(conn, platform, "rollup_daily_platform")
         start = start or s
         end = end or e
 
-    sql = """
-    SELECT date,
-           SUM(impressions) AS impressions,
-           SUM(clicks)      AS clicks,
-           SUM(spend_usd)   AS spend_usd,
-           SUM(conversions) AS conversions,
-           SUM(revenue_usd) AS revenue_usd
-    FROM v_all_metrics_daily
-    WHERE date BETWEEN ? AND ?
-      AND (? = 'all' OR platform = ?)
-    GROUP BY date
+    windows = sorted(set(rolling or []))
+    if any(w < 1 or w > _ROLLING_MAX for w in windows):
+        raise ValueError(f"rolling windows must be between 1 and {_ROLLING_MAX} days")
+
+    # Pad the scan backwards so the first points in range see a full window
+    padded_start = start
+    if windows and start:
+        padded_start = (date.fromisoformat(start) - timedelta(days=windows[-1] - 1)).isoformat()
+
+    extra_cols, window_defs = _rolling_sql(windows)
+    if cumulative:
+        extra_cols += _CUMULATIVE_SQL
+        window_defs.append("wcum AS (ORDER BY day_num ROWS UNBOUNDED PRECEDING)")
+    extra = "".join(f",\n             {c}" for c in extra_cols)
+    window_clause = f"WINDOW {', '.join(window_defs)}" if window_defs else ""
+
+    sql = f"""
+    WITH daily AS (
+      SELECT date, julianday(date) AS day_num,
+             SUM(impressions) AS impressions,
+             SUM(clicks)      AS clicks,
+             SUM(spend_usd)   AS spend_usd,
+             SUM(conversions) AS conversions,
+             SUM(revenue_usd) AS revenue_usd
+      FROM rollup_daily_platform
+      WHERE date BETWEEN :padded_start AND :end
+        AND (:platform = 'all' OR platform = :platform)
+      GROUP BY date
+    ), windowed AS (
+      SELECT date, impressions, clicks, spend_usd, conversions, revenue_usd{extra}
+      FROM daily
+      {window_clause}
+    )
+    SELECT * FROM windowed
+    WHERE date >= :start
     ORDER BY date;
     """
-    rows = conn.execute(sql, [start, end, platform, platform]).fetchall()
+    cur = conn.execute(sql, {"padded_start": padded_start, "start": start,
+                             "end": end, "platform": platform})
+    extra_names = [d[0] for d in cur.description[6:]]
     out = []
-    for r in rows:
-        d, imp, clk, sp, conv, rev = r
+    for r in cur.fetchall():
+        d, imp, clk, sp, conv, rev = r[:6]
         cpc  = (sp / clk) if clk else 0
         cpa  = (sp / conv) if conv else None
         roas = (rev / sp) if sp else 0
-        out.append({
+        point = {
             "date": d,
             "impressions": int(imp or 0),
             "clicks": int(clk or 0),
@@ -85,7 +223,13 @@ def timeseries(conn, start: Optional[str], end: Optional[str], platform: str) ->
             "cpc": round(cpc, 4),
             "cpa": round(cpa, 4) if cpa is not None else None,
             "roas": round(roas, 4),
-        })
+        }
+        for name, val in zip(extra_names, r[6:]):
+            point[name] = round(val or 0, 4)
+        if cumulative:
+            sp_cum, rev_cum = point["spend_usd_cum"], point["revenue_usd_cum"]
+            point["roas_cum"] = round(rev_cum / sp_cum, 4) if sp_cum else 0
+        out.append(point)
     return out
 
 _SORT_SQL = {
@@ -95,26 +239,109 @@ _SORT_SQL = {
     "conversions": "SUM(conversions)"
 }
 
-def top_campaigns(conn, start: Optional[str], end: Optional[str], platform: str, limit: int, sort: str):
+_SORT_KEY = {
+    "roas": lambda sp, rev, conv: (rev / sp) if sp else 0,
+    "spend": lambda sp, rev, conv: sp,
+    "revenue": lambda sp, rev, conv: rev,
+    "conversions": lambda sp, rev, conv: conv,
+}
+
+def _top_campaigns_partitioned(parts, start: str, end: str, limit: int, sort: str):
+    sql = f"""
+    SELECT campaign_id, campaign_name, SUM(spend_usd), SUM(revenue_usd), SUM(conversions)
+    FROM {PARTITION_ROLLUP}
+    WHERE date BETWEEN ? AND ?
+    GROUP BY campaign_id, campaign_name;
+    """
+    merged = merge_sums(fan_out(parts, sql, [start, end]), 2)
+    key = _SORT_KEY.get(sort, _SORT_KEY["roas"])
+    ranked = sorted(merged.items(), key=lambda kv: key(*kv[1]), reverse=True)
+    return [(cid, cname, sp, rev, conv) for (cid, cname), (sp, rev, conv) in ranked[:limit]]
+
+def _leaderboard_rows(conn, start: str, end: str, platform: str, limit: int, sort: str):
+    # Exactly one window, even if several were built for the same range
+    sql = """
+    SELECT campaign_id, campaign_name, spend_usd, revenue_usd, conversions
+    FROM leaderboard_campaign
+    WHERE window = (SELECT MIN(window) FROM leaderboard_campaign
+                    WHERE platform = ? AND sort = ? AND start = ? AND end = ?)
+      AND platform = ? AND sort = ? AND rank <= ?
+    ORDER BY rank;
+    """
+    try:
+        rows = conn.execute(sql, [platform, sort, start, end, platform, sort, limit]).fetchall()
+    except sqlite3.OperationalError:  # rollups built before leaderboards existed
+        return None
+    if len(rows) > limit or len({r[0] for r in rows}) != len(rows):
+        return None  # not a single clean ranking; recompute instead
+    return rows or None
+
+def _full_months(start: str, end: str) -> Optional[Tuple[date, date]]:
+    """First day of the first whole month and last day of the last whole month in [start, end]."""
+    s, e = date.fromisoformat(start), date.fromisoformat(end)
+    first = s if s.day == 1 else (s.replace(day=28) + timedelta(days=4)).replace(day=1)
+    last = e if (e + timedelta(days=1)).day == 1 else e.replace(day=1) - timedelta(days=1)
+    return (first, last) if first <= last else None
+
+def _top_campaigns_monthly(conn, start: str, end: str, platform: str, limit: int, sort: str):
     sort_expr = _SORT_SQL.get(sort, _SORT_SQL["roas"])
-    if not start or not end:
-        s, e = _date_bounds(conn, platform)
-        start = start or s
-        end = end or e
+    months = _full_months(start, end)
+    if months:
+        first, last = months
+        month_range = [first.strftime("%Y-%m"), last.strftime("%Y-%m")]
+        # Daily rows only for the partial months at either edge (an empty range when aligned)
+        edges = [start, (first - timedelta(days=1)).isoformat(), (last + timedelta(days=1)).isoformat(), end]
+    else:
+        month_range = ["", ""]
+        edges = [start, end, "", ""]
 
     sql = f"""
+    WITH parts AS (
+      SELECT campaign_id, campaign_name, spend_usd, revenue_usd, conversions
+      FROM rollup_monthly_platform_campaign
+      WHERE month BETWEEN ? AND ?
+        AND (? = 'all' OR platform = ?)
+      UNION ALL
+      SELECT campaign_id, campaign_name, spend_usd, revenue_usd, conversions
+      FROM rollup_daily_platform_campaign
+      WHERE (date BETWEEN ? AND ? OR date BETWEEN ? AND ?)
+        AND (? = 'all' OR platform = ?)
+    )
     SELECT campaign_id, campaign_name,
            SUM(spend_usd)   AS spend_usd,
            SUM(revenue_usd) AS revenue_usd,
            SUM(conversions) AS conversions
-    FROM v_all_metrics_daily
-    WHERE date BETWEEN ? AND ?
-      AND (? = 'all' OR platform = ?)
+    FROM parts
     GROUP BY campaign_id, campaign_name
     ORDER BY {sort_expr} DESC
     LIMIT ?;
     """
-    rows = conn.execute(sql, [start, end, platform, platform, limit]).fetchall()
+    params = month_range + [platform, platform] + edges + [platform, platform, limit]
+    return conn.execute(sql, params).fetchall()
+
+def top_campaigns_sourced(conn, start: Optional[str], end: Optional[str], platform: str,
+                          limit: int, sort: str) -> Tuple[List[Dict[str, Any]], str]:
+    """Top campaigns plus where they came from: precomputed, partitions or monthly_merge."""
+    sort = sort if sort in _SORT_SQL else "roas"
+    if not start or not end:
+        s, e = _date_bounds(conn, platform, "rollup_daily_platform")
+        start = start or s
+        end = end or e
+
+    rows = _leaderboard_rows(conn, start, end, platform, limit, sort)
+    if rows is not None:
+        return _format_top_campaigns(rows), "precomputed"
+
+    parts = _partitions(conn, start, end, platform)
+    if parts is not None:
+        return _format_top_campaigns(_top_campaigns_partitioned(parts, start, end, limit, sort)), "partitions"
+
+    return _format_top_campaigns(_top_campaigns_monthly(conn, start, end, platform, limit, sort)), "monthly_merge"
+
+def top_campaigns(conn, start: Optional[str], end: Optional[str], platform: str, limit: int, sort: str):
+    return top_campaigns_sourced(conn, start, end, platform, limit, sort)[0]
+
+def _format_top_campaigns(rows):
     out = []
     for cid, cname, sp, rev, conv in rows:
         roas = (rev / sp) if sp else 0
@@ -128,9 +355,333 @@ def top_campaigns(conn, start: Optional[str], end: Optional[str], platform: str,
         })
     return out
 
+def data_version(conn) -> Dict[str, Any]:
+    try:
+        row = conn.execute("SELECT value FROM pipeline_meta WHERE key = 'data_version'").fetchone()
+    except sqlite3.OperationalError:  # views/rollups not built yet
+        row = None
+    return {"data_version": row[0] if row else None}
+
 def bounds(conn, platform: str):
     where = "" if platform == "all" else "WHERE platform = ?"
     params = [] if platform == "all" else [platform]
     cur = conn.execute(f"SELECT MIN(date), MAX(date) FROM v_all_metrics_daily {where}", params)
     mn, mx = cur.fetchone()
     return {"min": mn, "max": mx}
+
+
+# Drill-down levels: rollup table, id column and the descriptive columns carried along
+_BREAKDOWN_LEVELS = {
+    "campaign": ("rollup_daily_platform_campaign", "campaign_id",
+                 ["campaign_name"]),
+    "ad_group": ("rollup_daily_platform_ad_group", "ad_group_id",
+                 ["campaign_id", "campaign_name", "ad_group_name"]),
+    "ad":       ("rollup_daily_platform_ad", "ad_id",
+                 ["campaign_id", "campaign_name", "ad_group_id", "ad_group_name"]),
+}
+
+_BREAKDOWN_SORT_SQL = {
+    "roas": "CASE WHEN spend_usd>0 THEN revenue_usd/spend_usd ELSE 0 END",
+    "spend": "spend_usd",
+    "revenue": "revenue_usd",
+    "conversions": "conversions",
+    "clicks": "clicks",
+    "impressions": "impressions",
+}
+
+# A cursor carries the query it was issued for (level, filters, sort) plus the
+# last row's keyset position, so it can't be replayed against a different query
+def _encode_cursor(query: list, sort_value, platform: str, key: str) -> str:
+    raw = json.dumps({"q": query, "k": [sort_value, platform, key]}).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor: str, query: list):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        sort_value, platform, key = data["k"]
+        issued_for = data["q"]
+    except Exception:
+        raise ValueError("invalid cursor")
+    if (isinstance(sort_value, bool) or not isinstance(sort_value, (int, float))
+            or not isinstance(platform, str) or not isinstance(key, str)):
+        raise ValueError("invalid cursor")
+    if issued_for != query:
+        raise ValueError("cursor does not match this query; restart without a cursor")
+    return sort_value, platform, key
+
+def breakdown(conn, start: Optional[str], end: Optional[str], platform: str, level: str,
+              campaign_id: Optional[str] = None, ad_group_id: Optional[str] = None,
+              sort: str = "spend", order: str = "desc", limit: int = 50,
+              cursor: Optional[str] = None) -> Dict[str, Any]:
+    table, id_col, attr_cols = _BREAKDOWN_LEVELS[level]
+    sort_expr = _BREAKDOWN_SORT_SQL.get(sort, _BREAKDOWN_SORT_SQL["spend"])
+    if not start or not end:
+        s, e = _date_bounds(conn, platform, table)
+        start = start or s
+        end = end or e
+
+    filters = ["date BETWEEN ? AND ?", "(? = 'all' OR platform = ?)"]
+    params: List[Any] = [start, end, platform, platform]
+    if campaign_id and level != "campaign":
+        filters.append("campaign_id = ?")
+        params.append(campaign_id)
+    if ad_group_id and level == "ad":
+        filters.append("ad_group_id = ?")
+        params.append(ad_group_id)
+
+    # Keyset pagination on (sort_value, platform, id); the tie-break is always ascending
+    query = [level, platform, sort, order, start, end,
+             campaign_id if level != "campaign" else None, ad_group_id if level == "ad" else None]
+    cmp = "<" if order == "desc" else ">"
+    keyset = ""
+    if cursor:
+        c_val, c_platform, c_key = _decode_cursor(cursor, query)
+        keyset = f"WHERE sort_value {cmp} ? OR (sort_value = ? AND (platform, id) > (?, ?))"
+        params_keyset = [c_val, c_val, c_platform, c_key]
+    else:
+        params_keyset = []
+
+    attrs = ", ".join(f"MAX({c}) AS {c}" for c in attr_cols)
+    sql = f"""
+    WITH agg AS (
+      SELECT platform, {id_col} AS id, {attrs},
+             SUM(impressions) AS impressions,
+             SUM(clicks)      AS clicks,
+             SUM(spend_usd)   AS spend_usd,
+             SUM(conversions) AS conversions,
+             SUM(revenue_usd) AS revenue_usd
+      FROM {table}
+      WHERE {" AND ".join(filters)}
+      GROUP BY platform, {id_col}
+    ), ranked AS (
+      SELECT *, {sort_expr} AS sort_value FROM agg
+    )
+    SELECT platform, id, {", ".join(attr_cols)},
+           impressions, clicks, spend_usd, conversions, revenue_usd, sort_value
+    FROM ranked
+    {keyset}
+    ORDER BY sort_value {order.upper()}, platform, id
+    LIMIT ?;
+    """
+    # Fetch one extra row to know whether another page exists
+    rows = conn.execute(sql, params + params_keyset + [limit + 1]).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    items = []
+    for r in rows:
+        plat, key = r[0], r[1]
+        attrs_vals = r[2:2 + len(attr_cols)]
+        imp, clk, sp, conv, rev, _ = r[2 + len(attr_cols):]
+        cpc  = (sp / clk) if clk else 0
+        cpa  = (sp / conv) if conv else None
+        roas = (rev / sp) if sp else 0
+        item = {"platform": plat, id_col: key}
+        item.update(zip(attr_cols, attrs_vals))
+        item.update({
+            "impressions": int(imp or 0),
+            "clicks": int(clk or 0),
+            "spend_usd": round(sp or 0, 2),
+            "conversions": int(conv or 0),
+            "revenue_usd": round(rev or 0, 2),
+            "cpc": round(cpc, 4),
+            "cpa": round(cpa, 4) if cpa is not None else None,
+            "roas": round(roas, 4),
+        })
+        items.append(item)
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = _encode_cursor(query, last[-1], last[0], last[1])
+
+    return {
+        "start": start, "end": end, "platform": platform, "level": level,
+        "sort": sort, "order": order,
+        "items": items,
+        "next_cursor": next_cursor,
+    }
+
+def _shift_window(start: str, end: str, baseline: str) -> Tuple[str, str]:
+    s, e = date.fromisoformat(start), date.fromisoformat(end)
+    if e < s:
+        raise ValueError("start must be on or before end")
+    if baseline == "year_ago":
+        def _year_back(d: date) -> date:
+            try:
+                return d.replace(year=d.year - 1)
+            except ValueError:  # Feb 29
+                return d.replace(year=d.year - 1, day=28)
+        return _year_back(s).isoformat(), _year_back(e).isoformat()
+    span = (e - s).days + 1
+    return (s - timedelta(days=span)).isoformat(), (s - timedelta(days=1)).isoformat()
+
+def _kpis(imp, clk, sp, conv, rev) -> Dict[str, Any]:
+    return {
+        "impressions": int(imp or 0),
+        "clicks": int(clk or 0),
+        "spend_usd": round(sp or 0, 2),
+        "conversions": int(conv or 0),
+        "revenue_usd": round(rev or 0, 2),
+        "cpc": round(sp / clk, 4) if clk else 0,
+        "cpa": round(sp / conv, 4) if conv else None,
+        "roas": round(rev / sp, 4) if sp else 0,
+    }
+
+def _deltas(cur: Dict[str, Any], prev: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for k, c in cur.items():
+        p = prev[k]
+        if c is None or p is None:
+            out[k] = {"delta": None, "pct_change": None}
+            continue
+        out[k] = {
+            "delta": round(c - p, 4),
+            "pct_change": round((c - p) / p, 4) if p else None,
+        }
+    return out
+
+_MOVER_KEYS = {"roas": "roas", "spend": "spend_usd", "revenue": "revenue_usd", "conversions": "conversions"}
+
+def compare(conn, start: Optional[str], end: Optional[str], platform: str,
+            baseline: str = "previous", limit: int = 10, sort: str = "revenue") -> Dict[str, Any]:
+    if not start or not end:
+        s, e = _date_bounds(conn, platform, "rollup_daily_platform")
+        start = start or s
+        end = end or e
+    if not start or not end:  # no data loaded yet
+        empty = _kpis(0, 0, 0, 0, 0)
+        return {
+            "platform": platform,
+            "baseline": baseline,
+            "current": {"start": start, "end": end, **empty},
+            "previous": {"start": None, "end": None, **empty},
+            "deltas": _deltas(empty, empty),
+            "movers": {"sort": sort, "gainers": [], "losers": []},
+        }
+    prev_start, prev_end = _shift_window(start, end, baseline)
+
+    # One pass over the campaign rollup: each row lands in the current or previous bucket
+    sql = """
+    SELECT platform, campaign_id, campaign_name,
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN impressions ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN clicks      ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN spend_usd   ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN conversions ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN revenue_usd ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN impressions ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN clicks      ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN spend_usd   ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN conversions ELSE 0 END),
+           SUM(CASE WHEN date BETWEEN ? AND ? THEN revenue_usd ELSE 0 END)
+    FROM rollup_daily_platform_campaign
+    WHERE (date BETWEEN ? AND ? OR date BETWEEN ? AND ?)
+      AND (? = 'all' OR platform = ?)
+    GROUP BY platform, campaign_id, campaign_name;
+    """
+    params = [start, end] * 5 + [prev_start, prev_end] * 5 \
+        + [start, end, prev_start, prev_end, platform, platform]
+    rows = conn.execute(sql, params).fetchall()
+
+    cur_tot = [0] * 5
+    prev_tot = [0] * 5
+    campaigns = []
+    for plat, cid, cname, *vals in rows:
+        cur_vals, prev_vals = vals[:5], vals[5:]
+        cur_tot = [a + (b or 0) for a, b in zip(cur_tot, cur_vals)]
+        prev_tot = [a + (b or 0) for a, b in zip(prev_tot, prev_vals)]
+        cur_k, prev_k = _kpis(*cur_vals), _kpis(*prev_vals)
+        campaigns.append({
+            "platform": plat,
+            "campaign_id": cid,
+            "campaign_name": cname,
+            "current": cur_k,
+            "previous": prev_k,
+            "deltas": _deltas(cur_k, prev_k),
+        })
+
+    key = _MOVER_KEYS.get(sort, _MOVER_KEYS["revenue"])
+    campaigns.sort(key=lambda c: c["deltas"][key]["delta"])
+    gainers = [c for c in reversed(campaigns) if c["deltas"][key]["delta"] > 0][:limit]
+    losers = [c for c in campaigns if c["deltas"][key]["delta"] < 0][:limit]
+
+    cur_k, prev_k = _kpis(*cur_tot), _kpis(*prev_tot)
+    return {
+        "platform": platform,
+        "baseline": baseline,
+        "current": {"start": start, "end": end, **cur_k},
+        "previous": {"start": prev_start, "end": prev_end, **prev_k},
+        "deltas": _deltas(cur_k, prev_k),
+        "movers": {"sort": sort, "gainers": gainers, "losers": losers},
+    }
+
+# Results of frequent queries (bounds, default summaries), dropped when the data version changes
+_RESULTS_MAX = 256
+_results: Dict[tuple, Any] = {}
+_results_version: Optional[str] = None
+_results_lock = threading.Lock()
+
+def cached(conn, fn, *args):
+    global _results_version
+    version = data_version(conn)["data_version"]
+    if version is None:
+        # Nothing to invalidate on: an unversioned database is always read fresh
+        return fn(conn, *args)
+    key = (fn.__name__,) + args
+    with _results_lock:
+        if version != _results_version:
+            _results.clear()
+            _results_version = version
+        if key in _results:
+            return _results[key]
+    val = fn(conn, *args)
+    with _results_lock:
+        if version == _results_version:
+            _results[key] = val
+            while len(_results) > _RESULTS_MAX:
+                _results.pop(next(iter(_results)))
+    return val
+
+# Rollups read by the endpoints; the daily ones are also indexed by date
+_WARM_TABLES = {
+    "rollup_daily_platform": True,
+    "rollup_daily_platform_campaign": True,
+    "rollup_daily_platform_ad_group": True,
+    "rollup_daily_platform_ad": True,
+    "rollup_monthly_platform_campaign": False,
+    "leaderboard_campaign": False,
+}
+
+def warm_up() -> Dict[str, Any]:
+    """Prime the pool, pull rollup tables/indexes into the page cache and precompute common results."""
+    steps: Dict[str, float] = {}
+    t0 = time.perf_counter()
+
+    def step(name):
+        steps[name] = round(time.perf_counter() - t0 - sum(steps.values()), 4)
+
+    prime_pool()
+    step("pool")
+
+    with get_conn() as conn:
+        for table, dated in _WARM_TABLES.items():
+            try:
+                # MIN/MAX walk the date index, the SUM reads every table page
+                if dated:
+                    conn.execute(f"SELECT MIN(date), MAX(date) FROM {table}").fetchone()
+                conn.execute(f"SELECT COUNT(*), SUM(spend_usd) FROM {table}").fetchone()
+            except sqlite3.OperationalError:  # rollup not built in this database
+                pass
+        step("tables")
+
+        for platform in ("all", "google", "meta"):
+            b = cached(conn, bounds, platform)
+            if not b["max"]:
+                continue
+            end = b["max"]
+            start = (date.fromisoformat(end) - timedelta(days=29)).isoformat()
+            cached(conn, summary, start, end, platform)
+            cached(conn, summary, None, None, platform)
+        step("queries")
+
+    return {"seconds": round(time.perf_counter() - t0, 4), "steps": steps, "pool_size": _pool.qsize()}
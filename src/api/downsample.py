@@ -0,0 +1,48 @@
+import numpy as np
+from typing import Any, Dict, List, Sequence
+
+# Series the UI charts; the selected points have to keep the shape of all of them
+LTTB_COLUMNS = ("impressions", "clicks", "conversions", "spend_usd", "revenue_usd")
+
+def _normalize(ys: np.ndarray) -> np.ndarray:
+    lo = ys.min(axis=1, keepdims=True)
+    span = ys.max(axis=1, keepdims=True) - lo
+    span[span == 0] = 1.0
+    return (ys - lo) / span
+
+def lttb_indices(x: np.ndarray, ys: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over several series at once.
+
+    ys has shape (n_series, n); each series is scaled to [0, 1] and the triangle
+    areas are summed, so the kept point is the one that best preserves all series.
+    """
+    n = x.shape[0]
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = (x - x[0]) / max(x[-1] - x[0], 1)
+    ys = _normalize(ys.astype(float))
+
+    # n_out - 2 buckets over the interior points, then the last point as a final bucket
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.int64), n)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, nxt = edges[i], edges[i + 1], edges[i + 2]
+        cx = x[hi:nxt].mean()
+        cy = ys[:, hi:nxt].mean(axis=1, keepdims=True)
+        ax, ay = x[a], ys[:, a:a + 1]
+        area = np.abs((ax - cx) * (ys[:, lo:hi] - ay) - (ax - x[lo:hi]) * (cy - ay)).sum(axis=0)
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def downsample_points(points: List[Dict[str, Any]], max_points: int,
+                      columns: Sequence[str] = LTTB_COLUMNS) -> List[Dict[str, Any]]:
+    if len(points) <= max_points:
+        return points
+    x = np.array([p["date"] for p in points], dtype="datetime64[D]").astype(np.int64).astype(float)
+    ys = np.array([[p.get(c) or 0 for p in points] for c in columns], dtype=float)
+    return [points[i] for i in lttb_indices(x, ys, max_points)]
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 import sqlite3
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 import argparse
 
+from utils.partitions import PARTITION_ROLLUP, ensure_catalog, iter_fan_out, prune_partitions, stale_partitions
+
 VIEWS_SQL = [
     # --- Google standardized metrics
     """
@@ -65,7 +68,11 @@ VIEWS_SQL = [
 # Materialized rollups (drop/rebuild each run for simplicity)
 ROLLUPS_DROP = [
     "DROP TABLE IF EXISTS rollup_daily_platform;",
-    "DROP TABLE IF EXISTS rollup_daily_platform_campaign;"
+    "DROP TABLE IF EXISTS rollup_daily_platform_campaign;",
+    "DROP TABLE IF EXISTS rollup_daily_platform_ad_group;",
+    "DROP TABLE IF EXISTS rollup_daily_platform_ad;",
+    "DROP TABLE IF EXISTS rollup_monthly_platform_campaign;",
+    "DROP TABLE IF EXISTS leaderboard_campaign;"
 ]
 
 ROLLUPS_CREATE = [
@@ -90,27 +97,248 @@ ROLLUPS_CREATE = [
            SUM(revenue_usd)   AS revenue_usd
     FROM v_all_metrics_daily
     GROUP BY date, platform, campaign_id, campaign_name;
+    """,
+    """
+    CREATE TABLE rollup_daily_platform_ad_group AS
+    SELECT date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name,
+           SUM(impressions)   AS impressions,
+           SUM(clicks)        AS clicks,
+           SUM(spend_usd)     AS spend_usd,
+           SUM(conversions)   AS conversions,
+           SUM(revenue_usd)   AS revenue_usd
+    FROM v_all_metrics_daily
+    GROUP BY date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name;
+    """,
+    """
+    CREATE TABLE rollup_daily_platform_ad AS
+    SELECT date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name, ad_id,
+           SUM(impressions)   AS impressions,
+           SUM(clicks)        AS clicks,
+           SUM(spend_usd)     AS spend_usd,
+           SUM(conversions)   AS conversions,
+           SUM(revenue_usd)   AS revenue_usd
+    FROM v_all_metrics_daily
+    GROUP BY date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name, ad_id;
     """
 ]
 
-def main():
-    parser = argparse.ArgumentParser(description="Build standardized views and rollups.")
-    parser.add_argument("--db", default="data/ads_performance.db")
-    args = parser.parse_args()
+# Per-month partial aggregates: arbitrary windows merge whole months from here
+# with the daily rollup for the partial months at either edge
+ROLLUPS_MONTHLY = [
+    """
+    CREATE TABLE rollup_monthly_platform_campaign AS
+    SELECT substr(date, 1, 7) AS month, platform, campaign_id, campaign_name,
+           SUM(impressions)   AS impressions,
+           SUM(clicks)        AS clicks,
+           SUM(spend_usd)     AS spend_usd,
+           SUM(conversions)   AS conversions,
+           SUM(revenue_usd)   AS revenue_usd
+    FROM rollup_daily_platform_campaign
+    GROUP BY substr(date, 1, 7), platform, campaign_id, campaign_name;
+    """
+]
 
-    Path(args.db).parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(args.db)
-    cur = conn.cursor()
+# Precomputed top-K campaigns for the standard windows, anchored at the latest
+# date of each platform scope; /metrics/top-campaigns serves exact matches from here
+LEADERBOARD_K = 100
+LEADERBOARD_WINDOWS = {"last_7d": 7, "last_30d": 30, "last_90d": 90, "mtd": None}
+LEADERBOARD_SORT_SQL = {
+    "roas": "CASE WHEN SUM(spend_usd)>0 THEN SUM(revenue_usd)/SUM(spend_usd) ELSE 0 END",
+    "spend": "SUM(spend_usd)",
+    "revenue": "SUM(revenue_usd)",
+    "conversions": "SUM(conversions)"
+}
+
+LEADERBOARD_DDL = """
+CREATE TABLE leaderboard_campaign (
+  window TEXT NOT NULL,
+  platform TEXT NOT NULL,
+  sort TEXT NOT NULL,
+  start TEXT NOT NULL,
+  end TEXT NOT NULL,
+  rank INTEGER NOT NULL,
+  campaign_id TEXT NOT NULL,
+  campaign_name TEXT NOT NULL,
+  spend_usd REAL NOT NULL,
+  revenue_usd REAL NOT NULL,
+  conversions INTEGER NOT NULL,
+  PRIMARY KEY (window, platform, sort, rank)
+);"""
+
+# Indexes for date-range scans and drill-down by parent id (dropped with their tables)
+ROLLUPS_INDEXES = [
+    "CREATE INDEX idx_rollup_dp_date ON rollup_daily_platform (date, platform);",
+    "CREATE INDEX idx_rollup_dpc_date ON rollup_daily_platform_campaign (date, platform);",
+    "CREATE INDEX idx_rollup_dpag_date ON rollup_daily_platform_ad_group (date, platform);",
+    "CREATE INDEX idx_rollup_dpag_campaign ON rollup_daily_platform_ad_group (campaign_id, date);",
+    "CREATE INDEX idx_rollup_dpa_date ON rollup_daily_platform_ad (date, platform);",
+    "CREATE INDEX idx_rollup_dpa_campaign ON rollup_daily_platform_ad (campaign_id, date);",
+    "CREATE INDEX idx_rollup_dpa_ad_group ON rollup_daily_platform_ad (ad_group_id, date);",
+    "CREATE INDEX idx_rollup_mpc_month ON rollup_monthly_platform_campaign (month, platform);",
+    "CREATE INDEX idx_leaderboard_lookup ON leaderboard_campaign (platform, sort, start, end, rank);",
+]
+
+# Bumped on every rebuild; clients use it to invalidate cached results
+META_DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+"""
+
+def bump_data_version(cur):
+    cur.execute(META_DDL)
+    cur.execute(
+        "INSERT OR REPLACE INTO pipeline_meta (key, value) VALUES ('data_version', ?);",
+        [datetime.now(timezone.utc).isoformat()],
+    )
 
-    # Create views
+def build_views(cur):
     for sql in VIEWS_SQL:
         cur.execute(sql)
 
-    # Rebuild rollups
+def window_bounds(window: str, end: str):
+    e = date.fromisoformat(end)
+    days = LEADERBOARD_WINDOWS[window]
+    s = e.replace(day=1) if days is None else e - timedelta(days=days - 1)
+    return s.isoformat(), end
+
+def build_leaderboards(cur):
+    cur.execute(LEADERBOARD_DDL)
+    for platform in ("all", "google", "meta"):
+        (end,) = cur.execute(
+            "SELECT MAX(date) FROM rollup_daily_platform WHERE (? = 'all' OR platform = ?)",
+            [platform, platform],
+        ).fetchone()
+        if end is None:
+            continue
+        written = set()
+        for window in LEADERBOARD_WINDOWS:
+            start, _ = window_bounds(window, end)
+            # mtd coincides with last_7d/last_30d on the 7th/30th; keep one copy per range
+            if start in written:
+                continue
+            written.add(start)
+            for sort, sort_expr in LEADERBOARD_SORT_SQL.items():
+                cur.execute(f"""
+                INSERT INTO leaderboard_campaign
+                SELECT ?, ?, ?, ?, ?,
+                       ROW_NUMBER() OVER (ORDER BY sort_value DESC, campaign_id),
+                       campaign_id, campaign_name, spend_usd, revenue_usd, conversions
+                FROM (
+                  SELECT campaign_id, campaign_name,
+                         SUM(spend_usd)   AS spend_usd,
+                         SUM(revenue_usd) AS revenue_usd,
+                         SUM(conversions) AS conversions,
+                         {sort_expr}      AS sort_value
+                  FROM rollup_daily_platform_campaign
+                  WHERE date BETWEEN ? AND ?
+                    AND (? = 'all' OR platform = ?)
+                  GROUP BY campaign_id, campaign_name
+                  ORDER BY sort_value DESC, campaign_id
+                  LIMIT ?
+                );
+                """, [window, platform, sort, start, end, start, end, platform, platform, LEADERBOARD_K])
+
+def _finish_rollups(cur):
+    for sql in ROLLUPS_MONTHLY:
+        cur.execute(sql)
+    build_leaderboards(cur)
+    for sql in ROLLUPS_INDEXES:
+        cur.execute(sql)
+    cur.execute("ANALYZE;")
+
+def build_rollups(cur):
     for sql in ROLLUPS_DROP:
         cur.execute(sql)
     for sql in ROLLUPS_CREATE:
         cur.execute(sql)
+    _finish_rollups(cur)
+
+# Partitioned layout: the ad-grain rollup is assembled from the partitions'
+# precomputed rollup_daily_ad tables, every coarser rollup derives from it
+_AD_ROLLUP_COLUMNS = ["date", "platform", "campaign_id", "campaign_name", "ad_group_id", "ad_group_name",
+                      "ad_id", "impressions", "clicks", "spend_usd", "conversions", "revenue_usd"]
+
+ROLLUPS_FROM_AD = [
+    """
+    CREATE TABLE rollup_daily_platform_ad_group AS
+    SELECT date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name,
+           SUM(impressions) AS impressions, SUM(clicks) AS clicks, SUM(spend_usd) AS spend_usd,
+           SUM(conversions) AS conversions, SUM(revenue_usd) AS revenue_usd
+    FROM rollup_daily_platform_ad
+    GROUP BY date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name;
+    """,
+    """
+    CREATE TABLE rollup_daily_platform_campaign AS
+    SELECT date, platform, campaign_id, campaign_name,
+           SUM(impressions) AS impressions, SUM(clicks) AS clicks, SUM(spend_usd) AS spend_usd,
+           SUM(conversions) AS conversions, SUM(revenue_usd) AS revenue_usd
+    FROM rollup_daily_platform_ad_group
+    GROUP BY date, platform, campaign_id, campaign_name;
+    """,
+    """
+    CREATE TABLE rollup_daily_platform AS
+    SELECT date, platform,
+           SUM(impressions) AS impressions, SUM(clicks) AS clicks, SUM(spend_usd) AS spend_usd,
+           SUM(conversions) AS conversions, SUM(revenue_usd) AS revenue_usd
+    FROM rollup_daily_platform_campaign
+    GROUP BY date, platform;
+    """,
+]
+
+def build_rollups_from_partitions(cur, base_dir: str, workers=None, allow_stale: bool = False):
+    """Rebuild the rollups from partition files.
+
+    Raises ValueError, before touching the rollups, if raw rows were loaded or
+    removed since partition_db.py last ran; `allow_stale` only prints a warning.
+    """
+    ensure_catalog(cur.connection)
+    stale = stale_partitions(cur.connection)
+    if stale:
+        msg = ("partitions are out of date with the raw tables (rerun partition_db.py, "
+               "with --rebuild-frozen for frozen months):\n"
+               + "\n".join(f"  {p} {m}: {reason}" for p, m, reason in stale))
+        if not allow_stale:
+            raise ValueError(msg)
+        print(f"WARNING: {msg}")
+    for sql in ROLLUPS_DROP:
+        cur.execute(sql)
+    cur.execute(f"CREATE TABLE rollup_daily_platform_ad AS SELECT {', '.join(_AD_ROLLUP_COLUMNS)} "
+                f"FROM v_all_metrics_daily WHERE 0;")
+    parts = prune_partitions(cur.connection, None, None, "all", base_dir)
+    cols = ", ".join(_AD_ROLLUP_COLUMNS)
+    insert = f"INSERT INTO rollup_daily_platform_ad ({cols}) VALUES ({', '.join(['?'] * len(_AD_ROLLUP_COLUMNS))})"
+    # Insert each partition as it arrives so only a few months are in memory at once
+    for rows in iter_fan_out(parts, f"SELECT {cols} FROM {PARTITION_ROLLUP}", [], workers):
+        cur.executemany(insert, rows)
+    for sql in ROLLUPS_FROM_AD:
+        cur.execute(sql)
+    _finish_rollups(cur)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build standardized views and rollups.")
+    parser.add_argument("--db", default="data/ads_performance.db")
+    parser.add_argument("--from-partitions", action="store_true",
+                        help="Build rollups from the partitions registered by partition_db.py")
+    parser.add_argument("--allow-stale", action="store_true",
+                        help="With --from-partitions, warn instead of failing when partitions lag the raw tables")
+    args = parser.parse_args()
+
+    Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(args.db)
+    cur = conn.cursor()
+
+    build_views(cur)
+    if args.from_partitions:
+        try:
+            build_rollups_from_partitions(cur, str(Path(args.db).resolve().parent), allow_stale=args.allow_stale)
+        except ValueError as e:
+            conn.close()
+            raise SystemExit(str(e))
+    else:
+        build_rollups(cur)
+    bump_data_version(cur)
 
     conn.commit()
     conn.close()
@@ -8,6 +8,7 @@ import pandas as pd
 from utils.google_generator import generate_google_ads_daily
 from utils.meta_generator import generate_meta_ads_daily
 from utils.db_helpers import init_db, insert_dataframe
+from build_views_and_rollups import bump_data_version
 
 def main():
     parser = argparse.ArgumentParser(description="Generate synthetic Google & Meta ads data into SQLite.")
@@ -31,6 +32,8 @@ def main():
     insert_dataframe(conn, "meta_ads_daily", meta_core_df)
     if not meta_actions_df.empty:
         insert_dataframe(conn, "meta_ads_actions_daily", meta_actions_df)
+    bump_data_version(conn.cursor())
+    conn.commit()
 
     print(f"\nSaved to SQLite: {args.db}")
     print(f"Rows → google_ads_daily: {len(google_df):,} | meta_ads_daily: {len(meta_core_df):,} | meta_ads_actions_daily: {len(meta_actions_df):,}")
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+import argparse
+from pathlib import Path
+
+from utils.db_helpers import init_db
+from utils.ingest import ingest_google_csv, ingest_meta_json
+from build_views_and_rollups import bump_data_version
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream Google Ads CSV / Meta Insights JSON exports into SQLite.")
+    parser.add_argument("--db", type=str, default="data/ads_performance.db", help="SQLite DB path")
+    parser.add_argument("--google-csv", type=str, action="append", default=[], help="Google Ads report CSV (repeatable)")
+    parser.add_argument("--meta-json", type=str, action="append", default=[], help="Meta Insights JSON/JSONL (repeatable)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per batch")
+    parser.add_argument("--append", action="store_true", help="Keep existing rows for dates present in the files")
+    args = parser.parse_args()
+
+    Path(args.db).parent.mkdir(parents=True, exist_ok=True)
+    conn = init_db(args.db)
+    # One seen-dates set per platform: only the first file touching a date replaces it
+    google_seen, meta_seen = set(), set()
+    for path in args.google_csv:
+        ingest_google_csv(conn, path, chunksize=args.chunk_size, replace_dates=not args.append, seen=google_seen)
+    for path in args.meta_json:
+        ingest_meta_json(conn, path, batch_size=args.chunk_size, replace_dates=not args.append, seen=meta_seen)
+    # Raw rows changed: invalidate version-keyed caches even before the rollups are rebuilt
+    bump_data_version(conn.cursor())
+    conn.commit()
+    conn.close()
+    print("Run build_views_and_rollups.py (or run_pipeline.py) to refresh the rollups.")
+
+if __name__ == "__main__":
+    main()
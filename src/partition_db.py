@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sqlite3
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from build_views_and_rollups import VIEWS_SQL, bump_data_version
+from utils.partitions import PARTITION_ROLLUP, PLATFORM_TABLES, ensure_catalog, partition_path
+PLATFORM_VIEW = {"google": (VIEWS_SQL[0], "v_google_metrics_daily"),
+                 "meta": (VIEWS_SQL[1], "v_meta_metrics_daily")}
+
+PARTITION_ROLLUP_SQL = f"""
+CREATE TABLE {PARTITION_ROLLUP} AS
+SELECT date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name, ad_id,
+       SUM(impressions)   AS impressions,
+       SUM(clicks)        AS clicks,
+       SUM(spend_usd)     AS spend_usd,
+       SUM(conversions)   AS conversions,
+       SUM(revenue_usd)   AS revenue_usd
+FROM {{view}}
+GROUP BY date, platform, campaign_id, campaign_name, ad_group_id, ad_group_name, ad_id;
+"""
+
+def _month_bounds(month: str):
+    y, m = map(int, month.split("-"))
+    nxt = f"{y + 1}-01" if m == 12 else f"{y}-{m + 1:02d}"
+    return f"{month}-01", f"{nxt}-01"
+
+def build_partition(main_db: str, path: str, platform: str, month: str):
+    """Write one (platform, month) partition atomically; returns (min_date, max_date, rows, source_rows)."""
+    lo, hi = _month_bounds(month)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    conn.execute("ATTACH DATABASE ? AS src", [f"file:{main_db}?mode=ro"])
+    for table, date_col in PLATFORM_TABLES[platform].items():
+        conn.execute(f"CREATE TABLE main.{table} AS SELECT * FROM src.{table} "
+                     f"WHERE {date_col} >= ? AND {date_col} < ?", [lo, hi])
+    conn.commit()
+    conn.execute("DETACH DATABASE src")
+    source_rows = sum(conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+                      for table in PLATFORM_TABLES[platform])
+
+    view_sql, view_name = PLATFORM_VIEW[platform]
+    conn.execute(view_sql)
+    conn.execute(PARTITION_ROLLUP_SQL.format(view=view_name))
+    conn.execute(f"CREATE INDEX idx_{PARTITION_ROLLUP}_date ON {PARTITION_ROLLUP} (date, campaign_id);")
+    mn, mx, rows = conn.execute(f"SELECT MIN(date), MAX(date), COUNT(*) FROM {PARTITION_ROLLUP}").fetchone()
+    conn.commit()
+    conn.close()
+    if os.path.exists(path):
+        os.chmod(path, stat.S_IRUSR | stat.S_IWUSR)
+    os.replace(tmp, path)
+    return mn, mx, rows, source_rows
+
+def _months(conn, platform: str):
+    table, date_col = next(iter(PLATFORM_TABLES[platform].items()))
+    rows = conn.execute(f"SELECT DISTINCT substr({date_col}, 1, 7) FROM {table} ORDER BY 1").fetchall()
+    return [r[0] for r in rows]
+
+def build_partitions(db: str, root: str, workers: int, rebuild_frozen: bool = False):
+    conn = sqlite3.connect(db)
+    ensure_catalog(conn)
+    # Each partition build reads one month; index the date columns so it doesn't scan all history
+    for tables in PLATFORM_TABLES.values():
+        for table, date_col in tables.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{date_col} ON {table} ({date_col});")
+    conn.commit()
+
+    frozen = {(p, m) for p, m in conn.execute("SELECT platform, month FROM partition_catalog WHERE frozen = 1")}
+    base_dir = Path(db).resolve().parent
+    jobs = []
+    for platform in PLATFORM_TABLES:
+        for month in _months(conn, platform):
+            if (platform, month) in frozen and not rebuild_frozen:
+                continue
+            jobs.append((platform, month, partition_path(root, platform, month)))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(build_partition, str(Path(db).resolve()), str(path), platform, month):
+                   (platform, month, path) for platform, month, path in jobs}
+        for fut, (platform, month, path) in futures.items():
+            mn, mx, rows, source_rows = fut.result()
+            if rows == 0:
+                continue
+            rel = os.path.relpath(Path(path).resolve(), base_dir)
+            conn.execute(
+                "INSERT OR REPLACE INTO partition_catalog "
+                "(platform, month, path, min_date, max_date, row_count, source_rows, frozen, built_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                [platform, month, rel, mn, mx, rows, source_rows, datetime.now(timezone.utc).isoformat()],
+            )
+            print(f"{platform} {month}: {rows:,} rollup rows")
+    bump_data_version(conn.cursor())
+    conn.commit()
+    conn.close()
+    print(f"Built {len(jobs)} partitions ({len(frozen)} frozen skipped).")
+
+def freeze_partitions(db: str, before: str):
+    """Compact and freeze every partition for months strictly before `before` (YYYY-MM)."""
+    conn = sqlite3.connect(db)
+    base_dir = Path(db).resolve().parent
+    rows = conn.execute(
+        "SELECT platform, month, path FROM partition_catalog WHERE frozen = 0 AND month < ?", [before]
+    ).fetchall()
+    for platform, month, rel in rows:
+        path = base_dir / rel
+        part = sqlite3.connect(path)
+        part.execute("VACUUM;")
+        part.close()
+        os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        conn.execute("UPDATE partition_catalog SET frozen = 1 WHERE platform = ? AND month = ?", [platform, month])
+        print(f"Froze {platform} {month}")
+    conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Split raw ads tables into per-platform, per-month partitions.")
+    parser.add_argument("--db", default="data/ads_performance.db")
+    parser.add_argument("--root", default=None, help="Partition directory (default: <db dir>/partitions)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Parallel partition builds")
+    parser.add_argument("--rebuild-frozen", action="store_true", help="Also rebuild frozen partitions")
+    parser.add_argument("--freeze-before", default=None, help="Compact + freeze partitions before this month (YYYY-MM)")
+    args = parser.parse_args()
+
+    root = args.root or str(Path(args.db).parent / "partitions")
+    build_partitions(args.db, root, args.workers, args.rebuild_frozen)
+    if args.freeze_before:
+        freeze_partitions(args.db, args.freeze_before)
+
+if __name__ == "__main__":
+    main()
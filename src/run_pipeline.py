@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from utils.google_generator import generate_google_ads_daily
+from utils.meta_generator import generate_meta_ads_daily
+from utils.db_helpers import init_db, replace_dataframe
+from utils.ingest import ingest_google_csv, ingest_meta_json
+from utils.pipeline import run_dag
+from build_views_and_rollups import build_views, build_rollups, bump_data_version
+
+# Loads from parallel branches share one SQLite file; wait on the write lock instead of failing
+DB_LOCK_TIMEOUT = 300
+
+def _staged(ctx, name: str) -> Path:
+    return Path(ctx["staging"]) / f"{name}.pkl"
+
+# ---- stages (top-level so they can run in worker processes)
+def generate_google(ctx):
+    df = generate_google_ads_daily(ctx["start"], ctx["days"], ctx["seed"])
+    Path(ctx["staging"]).mkdir(parents=True, exist_ok=True)
+    df.to_pickle(_staged(ctx, "google_ads_daily"))
+
+def generate_meta(ctx):
+    core_df, actions_df = generate_meta_ads_daily(ctx["start"], ctx["days"], ctx["seed"])
+    Path(ctx["staging"]).mkdir(parents=True, exist_ok=True)
+    core_df.to_pickle(_staged(ctx, "meta_ads_daily"))
+    actions_df.to_pickle(_staged(ctx, "meta_ads_actions_daily"))
+
+def _load(ctx, table: str):
+    conn = init_db(ctx["db"], timeout=DB_LOCK_TIMEOUT)
+    try:
+        replace_dataframe(conn, table, pd.read_pickle(_staged(ctx, table)))
+        # Endpoints that read the raw tables shouldn't serve cached results until publish
+        bump_data_version(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+def load_google(ctx):
+    _load(ctx, "google_ads_daily")
+
+def load_meta(ctx):
+    _load(ctx, "meta_ads_daily")
+
+def load_meta_actions(ctx):
+    _load(ctx, "meta_ads_actions_daily")
+
+def _ingest(ctx, tables, load, path):
+    conn = init_db(ctx["db"], timeout=DB_LOCK_TIMEOUT)
+    try:
+        # The export is the full source of truth for this run
+        for table in tables:
+            conn.execute(f"DELETE FROM {table}")
+        load(conn, path, replace_dates=False)
+        bump_data_version(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
+def ingest_google(ctx):
+    _ingest(ctx, ["google_ads_daily"], ingest_google_csv, ctx["google_csv"])
+
+def ingest_meta(ctx):
+    _ingest(ctx, ["meta_ads_daily", "meta_ads_actions_daily"], ingest_meta_json, ctx["meta_json"])
+
+def rollups(ctx):
+    conn = sqlite3.connect(ctx["db"], timeout=DB_LOCK_TIMEOUT)
+    cur = conn.cursor()
+    build_views(cur)
+    build_rollups(cur)
+    conn.commit()
+    conn.close()
+
+def publish(ctx):
+    conn = sqlite3.connect(ctx["db"], timeout=DB_LOCK_TIMEOUT)
+    bump_data_version(conn.cursor())
+    conn.commit()
+    conn.close()
+
+_GEN_PARAMS = ["start", "days", "seed"]
+
+STAGES = {
+    "generate_google": {
+        "fn": generate_google, "deps": [], "params": _GEN_PARAMS,
+        "sources": ["utils/google_generator.py"],
+        "outputs": lambda ctx: [_staged(ctx, "google_ads_daily")],
+    },
+    "generate_meta": {
+        "fn": generate_meta, "deps": [], "params": _GEN_PARAMS,
+        "sources": ["utils/meta_generator.py"],
+        "outputs": lambda ctx: [_staged(ctx, "meta_ads_daily"), _staged(ctx, "meta_ads_actions_daily")],
+    },
+    "load_google": {
+        "fn": load_google, "deps": ["generate_google"], "params": ["db"],
+        "sources": ["utils/db_helpers.py"],
+        "outputs": lambda ctx: [ctx["db"]],
+        "writes": ["google_ads_daily"],
+    },
+    "load_meta": {
+        "fn": load_meta, "deps": ["generate_meta"], "params": ["db"],
+        "sources": ["utils/db_helpers.py"],
+        "outputs": lambda ctx: [ctx["db"]],
+        "writes": ["meta_ads_daily"],
+    },
+    "load_meta_actions": {
+        "fn": load_meta_actions, "deps": ["generate_meta"], "params": ["db"],
+        "sources": ["utils/db_helpers.py"],
+        "outputs": lambda ctx: [ctx["db"]],
+        "writes": ["meta_ads_actions_daily"],
+    },
+    "rollups": {
+        "fn": rollups, "deps": ["load_google", "load_meta", "load_meta_actions"], "params": ["db"],
+        "sources": ["build_views_and_rollups.py"],
+        "outputs": lambda ctx: [ctx["db"]],
+    },
+    "publish": {
+        "fn": publish, "deps": ["rollups"], "params": ["db"],
+        "outputs": lambda ctx: [ctx["db"]],
+    },
+}
+
+def _file_stat(path: str):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+def build_stages(ctx):
+    """STAGES, with a platform's generate/load branch swapped for file ingestion when an export is given."""
+    stages = dict(STAGES)
+    rollup_deps = list(stages["rollups"]["deps"])
+    if ctx.get("google_csv"):
+        replaced = ("generate_google", "load_google")
+        for n in replaced:
+            stages.pop(n)
+        rollup_deps = [d for d in rollup_deps if d not in replaced]
+        stages["ingest_google"] = {
+            "fn": ingest_google, "deps": [], "params": ["db", "google_csv", "google_csv_stat"],
+            "sources": ["utils/ingest.py", "utils/db_helpers.py"],
+            "outputs": lambda ctx: [ctx["db"]],
+            "writes": ["google_ads_daily"],
+        }
+        rollup_deps.append("ingest_google")
+    if ctx.get("meta_json"):
+        replaced = ("generate_meta", "load_meta", "load_meta_actions")
+        for n in replaced:
+            stages.pop(n)
+        rollup_deps = [d for d in rollup_deps if d not in replaced]
+        stages["ingest_meta"] = {
+            "fn": ingest_meta, "deps": [], "params": ["db", "meta_json", "meta_json_stat"],
+            "sources": ["utils/ingest.py", "utils/db_helpers.py"],
+            "outputs": lambda ctx: [ctx["db"]],
+            "writes": ["meta_ads_daily", "meta_ads_actions_daily"],
+        }
+        rollup_deps.append("ingest_meta")
+    stages["rollups"] = {**stages["rollups"], "deps": rollup_deps}
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the generate → load → rollups → publish pipeline, skipping unchanged stages.")
+    parser.add_argument("--db", type=str, default="data/ads_performance.db", help="SQLite DB path")
+    parser.add_argument("--start", type=str, default="2024-01-01", help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=180, help="Number of days to generate")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--google-csv", type=str, help="Ingest this Google Ads report CSV instead of generating")
+    parser.add_argument("--meta-json", type=str, help="Ingest this Meta Insights JSON/JSONL instead of generating")
+    parser.add_argument("--workers", type=int, default=2, help="Parallel stage processes")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage")
+    args = parser.parse_args()
+
+    data_dir = Path(args.db).parent
+    data_dir.mkdir(parents=True, exist_ok=True)
+    ctx = {
+        "db": args.db,
+        "staging": str(data_dir / "staging"),
+        "start": args.start,
+        "days": args.days,
+        "seed": args.seed,
+    }
+    # Size + mtime stand in for a content hash so large exports aren't re-read just to fingerprint them
+    if args.google_csv:
+        ctx.update(google_csv=args.google_csv, google_csv_stat=_file_stat(args.google_csv))
+    if args.meta_json:
+        ctx.update(meta_json=args.meta_json, meta_json_stat=_file_stat(args.meta_json))
+    run = run_dag(build_stages(ctx), ctx,
+                  state_path=str(data_dir / "pipeline_state.json"),
+                  log_path=str(data_dir / "pipeline_runs.jsonl"),
+                  max_workers=args.workers, force=args.force)
+
+    for name, r in run["stages"].items():
+        line = f"{name:<18} {r['status']:<8} {r['seconds']:>8.2f}s"
+        if "error" in r:
+            line += f"  {r['error']}"
+        print(line)
+    print(f"Pipeline {'finished' if run['ok'] else 'FAILED'} in {run['seconds']:.2f}s")
+    if not run["ok"]:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
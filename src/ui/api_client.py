@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# How often run_sections rechecks loaders still waiting for a free thread (seconds)
+_QUEUED_POLL = 0.05
+
+class ApiClient:
+    """Keep-alive HTTP client for the metrics API.
+
+    One pooled session is shared by all UI sessions; each page run gets its own
+    section threads from `run_sections`.
+    GET responses can be cached per data version; every call appends a timing
+    record to the `telemetry` list it is given.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 8, max_cached: int = 512):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30,
+            version: Optional[str] = None, cache: bool = False,
+            telemetry: Optional[List[Dict[str, Any]]] = None) -> Any:
+        key = (version, path, tuple(sorted((params or {}).items())))
+        t0 = time.perf_counter()
+        if cache:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    data = self._cache[key]
+                    self._record(telemetry, path, params, t0, "cached")
+                    return data
+        try:
+            r = self.session.get(f"{self.base_url}{path}", params=params, timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+        except Exception as e:
+            self._record(telemetry, path, params, t0, type(e).__name__)
+            raise
+        self._record(telemetry, path, params, t0, str(r.status_code))
+        if cache:
+            with self._lock:
+                self._cache[key] = data
+                while len(self._cache) > self._max_cached:
+                    self._cache.popitem(last=False)
+        return data
+
+    @staticmethod
+    def _record(telemetry, path, params, t0, status):
+        if telemetry is None:
+            return
+        telemetry.append({
+            "endpoint": path,
+            "params": params or {},
+            "status": status,
+            "ms": round((time.perf_counter() - t0) * 1000, 1),
+        })
+
+    @staticmethod
+    def run_sections(sections: Dict[str, Tuple[Callable[[], Any], float]], max_in_flight: int = 4
+                     ) -> Iterator[Tuple[str, Any, Optional[Exception]]]:
+        """Run independent section loaders concurrently.
+
+        `sections` maps a name to (loader, timeout seconds). Yields
+        (name, result, error) as each finishes, in completion order; a section
+        that misses its deadline is yielded with a TimeoutError. Each call runs
+        at most `max_in_flight` loaders at once on its own threads, and a
+        section's deadline starts when its loader does, not while it is queued.
+        Loaders should pass their timeout on to the request: a timed-out loader
+        is abandoned, not interrupted.
+        """
+        started: Dict[str, float] = {}
+
+        def _run(name, fn):
+            started[name] = time.perf_counter()
+            return fn()
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(len(sections), max_in_flight)),
+                                      thread_name_prefix="section")
+        pending = {executor.submit(_run, name, fn): (name, timeout)
+                   for name, (fn, timeout) in sections.items()}
+        try:
+            while pending:
+                deadlines = [started[name] + timeout for name, timeout in pending.values() if name in started]
+                wait_for = min(deadlines) - time.perf_counter() if deadlines else _QUEUED_POLL
+                if len(deadlines) < len(pending):  # queued loaders: recheck once they start
+                    wait_for = min(wait_for, _QUEUED_POLL)
+                done, _ = wait(pending, timeout=max(0, wait_for), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name, _ = pending.pop(fut)
+                    err = fut.exception()
+                    yield name, (None if err else fut.result()), err
+                now = time.perf_counter()
+                for fut, (name, timeout) in list(pending.items()):
+                    if name in started and started[name] + timeout <= now:
+                        pending.pop(fut)
+                        yield name, None, TimeoutError(f"{name} did not respond in time")
+        finally:
+            # Drop loaders that never started; running ones end with their request timeout
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -1,17 +1,27 @@
 import os
+import time
 from datetime import date
-import requests
 import pandas as pd
 import streamlit as st
 
+from api_client import ApiClient
+from ts_cache import DailySeriesCache
+
 # ========= BASIC CONFIG =========
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8001")
 ENDPOINTS = {
-    "health": f"{API_BASE_URL}/health",
-    "summary": f"{API_BASE_URL}/metrics/summary",
-    "timeseries": f"{API_BASE_URL}/metrics/timeseries",
-    "top_campaigns": f"{API_BASE_URL}/metrics/top-campaigns",
+    "health": "/health",
+    "version": "/metrics/version",
+    "summary": "/metrics/summary",
+    "timeseries": "/metrics/timeseries",
+    "top_campaigns": "/metrics/top-campaigns",
 }
+# Roughly one point per horizontal pixel of a wide-layout chart
+CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "1200"))
+# Per-section deadlines (seconds); a slow section shows an error, the rest still render
+SECTION_TIMEOUTS = {"summary": 10, "charts": 20, "raw": 30, "top_campaigns": 10}
+# Without a published data version, cached responses expire on this clock instead
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
 
 # ========= HELPERS =========
 def _fmt_money(x):
@@ -26,42 +36,84 @@ def _fmt_int(x):
     except Exception:
         return x
 
-@st.cache_data(ttl=60)
-def api_get(url, params=None):
-    r = requests.get(url, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
+@st.cache_resource
+def api_client():
+    return ApiClient(API_BASE_URL)
+
+def api_get(path, params=None, version=None, timeout=30, telemetry=None):
+    # Cached until the API reports a new data version (the version is part of the key)
+    return api_client().get(path, params=params, timeout=timeout, version=version,
+                            cache=True, telemetry=telemetry)
 
-def check_api():
+def check_api(telemetry=None):
     try:
-        data = api_get(ENDPOINTS["health"])
+        data = api_client().get(ENDPOINTS["health"], timeout=5, telemetry=telemetry)
         return True, data
     except Exception as e:
         return False, str(e)
 
-def get_summary(start, end, platform):
+def _ttl_version():
+    return f"ttl-{int(time.time() // CACHE_TTL_SECONDS)}"
+
+def get_data_version(telemetry=None):
+    try:
+        version = api_client().get(ENDPOINTS["version"], timeout=5, telemetry=telemetry).get("data_version")
+    except Exception:
+        version = None
+    # No version (never published, or the API is unreachable): fall back to a time bucket
+    return version or _ttl_version()
+
+def _fetch_daily(platform, start, end, timeout=30, telemetry=None):
     params = {"start": start.isoformat(), "end": end.isoformat(), "platform": platform}
-    return api_get(ENDPOINTS["summary"], params=params)
+    return api_client().get(ENDPOINTS["timeseries"], params=params, timeout=timeout, telemetry=telemetry)
 
-def get_timeseries(start, end, platform, interval="day"):
+@st.cache_resource
+def daily_series_cache():
+    return DailySeriesCache(_fetch_daily)
+
+def get_summary(start, end, platform, version=None, **kw):
+    params = {"start": start.isoformat(), "end": end.isoformat(), "platform": platform}
+    return api_get(ENDPOINTS["summary"], params=params, version=version, **kw)
+
+def get_timeseries(start, end, platform, interval="day", max_points=None, version=None, **kw):
+    if not max_points or (end - start).days + 1 <= max_points:
+        # Ranges the server wouldn't downsample come from the incremental per-day cache
+        return daily_series_cache().get(platform, start, end, version, **kw)
     params = {"start": start.isoformat(), "end": end.isoformat(),
-              "platform": platform, "interval": interval}
-    return api_get(ENDPOINTS["timeseries"], params=params)
+              "platform": platform, "interval": interval, "max_points": max_points}
+    return api_get(ENDPOINTS["timeseries"], params=params, version=version, **kw)
+
+def _ts_frame(ts):
+    df = pd.DataFrame(ts)
+    if not df.empty and "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df.sort_values("date")
+    return df
 
-def get_top_campaigns(start, end, platform, limit=10):
+def get_top_campaigns(start, end, platform, limit=10, version=None, **kw):
     params = {"start": start.isoformat(), "end": end.isoformat(),
               "platform": platform, "limit": limit}
-    return api_get(ENDPOINTS["top_campaigns"], params=params)
+    return api_get(ENDPOINTS["top_campaigns"], params=params, version=version, **kw)
 
 # ========= UI =========
 st.set_page_config(page_title="Ads Metrics", page_icon="📊", layout="wide")
 st.title("📊 Ads Metrics)")
 
-ok, health = check_api()
+page_t0 = time.perf_counter()
+telemetry = []
+
+# Health and data version are independent: one round trip for both
+startup = {name: (result, err) for name, result, err in api_client().run_sections({
+    "health": (lambda: check_api(telemetry), 5),
+    "version": (lambda: get_data_version(telemetry), 5),
+})}
+ok, health = startup["health"][0] or (False, startup["health"][1])
 if not ok:
     st.error(f"API not reachable at {API_BASE_URL}\n\nDetails: {health}")
     st.stop()
 
+data_version = startup["version"][0] or _ttl_version()
+
 with st.sidebar:
     st.header("Filters")
     platform = st.selectbox("Platform", ["all", "google", "meta"], index=0)
@@ -92,10 +144,8 @@ if start > end:
     st.warning("Start date must be before end date.")
     st.stop()
 
-# ===== Summary (compact cards, 2 rows of 4) =====
-try:
-    summary = get_summary(start, end, platform)
-
+# ===== Section renderers =====
+def render_summary(summary):
     items = [
         ("Total Impressions", _fmt_int(summary.get("impressions"))),
         ("Total Clicks", _fmt_int(summary.get("clicks"))),
@@ -142,79 +192,107 @@ try:
             </div>
             """, unsafe_allow_html=True)
 
-except Exception as e:
-    st.error(f"Failed to load summary: {e}")
+def render_charts(ts):
+    import plotly.express as px
 
+    # Ranges longer than CHART_MAX_POINTS days arrive downsampled; the raw table gets every point
+    df_ts = _ts_frame(ts)
+    if df_ts.empty:
+        st.info("No timeseries data for the selected filters.")
+        return
+
+    # Engagement chart
+    st.markdown("**User Engagement (Impressions & Clicks)**")
+    cols = [c for c in ["impressions", "clicks"] if c in df_ts.columns]
+    if cols:
+        fig = px.line(df_ts, x="date", y=cols, title="Impressions vs Clicks Over Time")
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Conversions chart
+    if "conversions" in df_ts.columns:
+        st.markdown("**Conversions**")
+        fig = px.line(df_ts, x="date", y="conversions", title="Conversions Over Time")
+        st.plotly_chart(fig, use_container_width=True)
+
+    # Spend vs Revenue chart
+    money_cols = [c for c in ["spend_usd", "revenue_usd"] if c in df_ts.columns]
+    if money_cols:
+        st.markdown("**Spend vs Revenue (USD)**")
+        fig = px.area(df_ts, x="date", y=money_cols, title="Spend vs Revenue")
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_raw(ts):
+    df_ts = _ts_frame(ts)
+    if df_ts.empty:
+        return
+    st.markdown("**Raw Timeseries Data**")
+    st.dataframe(df_ts, use_container_width=True)
+
+def render_top_campaigns(top):
+    df_top = pd.DataFrame(top)
+    if df_top.empty:
+        st.info("No campaign rows for the selected filters.")
+        return
+    st.markdown("**Campaign Performance Table**")
+
+    money_cols = [c for c in ["spend_usd", "revenue_usd", "cpc", "cpa"] if c in df_top.columns]
+    int_cols = [c for c in ["impressions", "clicks", "conversions"] if c in df_top.columns]
+    fmt_df = df_top.copy()
+    for c in money_cols:
+        fmt_df[c] = fmt_df[c].apply(_fmt_money)
+    for c in int_cols:
+        fmt_df[c] = fmt_df[c].apply(_fmt_int)
+    if "roas" in fmt_df.columns:
+        fmt_df["roas"] = fmt_df["roas"].apply(lambda x: f"{x:.2f}x" if isinstance(x, (int, float)) else x)
+
+    st.dataframe(fmt_df, use_container_width=True)
+
+# ===== Layout: placeholders first, filled in as each call completes =====
+summary_box = st.container()
 st.divider()
-
-import plotly.express as px
-
 st.subheader("📈 Performance Over Time")
-
-try:
-    ts = get_timeseries(start, end, platform, interval=interval)
-    df_ts = pd.DataFrame(ts)
-
-    if not df_ts.empty:
-        if "date" in df_ts.columns:
-            df_ts["date"] = pd.to_datetime(df_ts["date"], errors="coerce")
-            df_ts = df_ts.sort_values("date")
-
-        # Engagement chart
-        st.markdown("**User Engagement (Impressions & Clicks)**")
-        cols = [c for c in ["impressions", "clicks"] if c in df_ts.columns]
-        if cols:
-            fig = px.line(df_ts, x="date", y=cols, title="Impressions vs Clicks Over Time")
-            st.plotly_chart(fig, use_container_width=True)
-
-        # Conversions chart
-        if "conversions" in df_ts.columns:
-            st.markdown("**Conversions**")
-            fig = px.line(df_ts, x="date", y="conversions", title="Conversions Over Time")
-            st.plotly_chart(fig, use_container_width=True)
-
-        # Spend vs Revenue chart
-        money_cols = [c for c in ["spend_usd", "revenue_usd"] if c in df_ts.columns]
-        if money_cols:
-            st.markdown("**Spend vs Revenue (USD)**")
-            fig = px.area(df_ts, x="date", y=money_cols, title="Spend vs Revenue")
-            st.plotly_chart(fig, use_container_width=True)
-
-        # Table
-        st.markdown("**Raw Timeseries Data**")
-        st.dataframe(df_ts, use_container_width=True)
-
-    else:
-        st.info("No timeseries data for the selected filters.")
-except Exception as e:
-    st.error(f"Failed to load timeseries: {e}")
-
-
+charts_box = st.container()
+raw_box = st.container()
 st.divider()
-
 st.subheader("🏆 Top Campaigns")
+top_box = st.container()
 
-try:
-    top = get_top_campaigns(start, end, platform, limit=limit)
-    df_top = pd.DataFrame(top)
-    if not df_top.empty:
-        st.markdown("**Campaign Performance Table**")
-
-        money_cols = [c for c in ["spend_usd", "revenue_usd", "cpc", "cpa"] if c in df_top.columns]
-        int_cols = [c for c in ["impressions", "clicks", "conversions"] if c in df_top.columns]
-        fmt_df = df_top.copy()
-        for c in money_cols:
-            fmt_df[c] = fmt_df[c].apply(_fmt_money)
-        for c in int_cols:
-            fmt_df[c] = fmt_df[c].apply(_fmt_int)
-        if "roas" in fmt_df.columns:
-            fmt_df["roas"] = fmt_df["roas"].apply(lambda x: f"{x:.2f}x" if isinstance(x, (int, float)) else x)
-
-        st.dataframe(fmt_df, use_container_width=True)
-    else:
-        st.info("No campaign rows for the selected filters.")
-except Exception as e:
-    st.error(f"Failed to load top campaigns: {e}")
+SECTIONS = {
+    "summary": (summary_box, render_summary, "summary"),
+    "charts": (charts_box, render_charts, "timeseries"),
+    "raw": (raw_box, render_raw, "timeseries"),
+    "top_campaigns": (top_box, render_top_campaigns, "top campaigns"),
+}
+placeholders = {name: box.empty() for name, (box, _, _) in SECTIONS.items()}
+for name, ph in placeholders.items():
+    ph.caption("Loading…")
+
+kw = {"version": data_version, "telemetry": telemetry}
+loaders = {
+    "summary": (lambda: get_summary(start, end, platform, timeout=SECTION_TIMEOUTS["summary"], **kw),
+                SECTION_TIMEOUTS["summary"]),
+    "charts": (lambda: get_timeseries(start, end, platform, interval=interval, max_points=CHART_MAX_POINTS,
+                                      timeout=SECTION_TIMEOUTS["charts"], **kw),
+               SECTION_TIMEOUTS["charts"]),
+    "raw": (lambda: get_timeseries(start, end, platform, interval=interval,
+                                   timeout=SECTION_TIMEOUTS["raw"], **kw),
+            SECTION_TIMEOUTS["raw"]),
+    "top_campaigns": (lambda: get_top_campaigns(start, end, platform, limit=limit,
+                                                timeout=SECTION_TIMEOUTS["top_campaigns"], **kw),
+                      SECTION_TIMEOUTS["top_campaigns"]),
+}
 
+for name, result, err in api_client().run_sections(loaders):
+    box, render, label = SECTIONS[name]
+    placeholders[name].empty()
+    with box:
+        if err is not None:
+            st.error(f"Failed to load {label}: {err}")
+        else:
+            render(result)
+
+with st.expander("API timings"):
+    st.caption(f"Page data loaded in {(time.perf_counter() - page_t0) * 1000:.0f} ms")
+    st.dataframe(pd.DataFrame(list(telemetry)), use_container_width=True)
 
 st.caption(f"API: {API_BASE_URL}")
@@ -0,0 +1,86 @@
+import threading
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Range = Tuple[date, date]
+
+def _missing_ranges(held: List[Range], start: date, end: date) -> List[Range]:
+    """Sub-ranges of [start, end] not covered by the sorted, disjoint `held` ranges."""
+    out = []
+    cursor = start
+    for s, e in held:
+        if e < cursor:
+            continue
+        if s > end:
+            break
+        if s > cursor:
+            out.append((cursor, s - timedelta(days=1)))
+        cursor = max(cursor, e + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        out.append((cursor, end))
+    return out
+
+def _add_range(held: List[Range], start: date, end: date) -> List[Range]:
+    """Insert [start, end] and merge overlapping or adjacent ranges."""
+    merged: List[Range] = []
+    for s, e in sorted(held + [(start, end)]):
+        if merged and s <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], e))
+        else:
+            merged.append((s, e))
+    return merged
+
+class DailySeriesCache:
+    """Per-platform cache of daily timeseries points.
+
+    Remembers which date ranges it already holds so a widened range only fetches
+    the missing days. Entries live until the API reports a new data version.
+    """
+
+    def __init__(self, fetch: Callable[..., List[Dict[str, Any]]]):
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        # One fetcher per platform: concurrent callers (charts, raw table) wait and reuse its days
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._version: Optional[str] = None
+        self._points: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._held: Dict[str, List[Range]] = {}
+
+    def _check_version(self, version: Optional[str]):
+        if version != self._version:
+            self._version = version
+            self._points.clear()
+            self._held.clear()
+
+    def get(self, platform: str, start: date, end: date, version: Optional[str],
+            **fetch_kwargs) -> List[Dict[str, Any]]:
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(platform, threading.Lock())
+
+        with fetch_lock:
+            with self._lock:
+                self._check_version(version)
+                missing = _missing_ranges(self._held.get(platform, []), start, end)
+
+            for s, e in missing:
+                rows = self._fetch(platform, s, e, **fetch_kwargs)
+                with self._lock:
+                    if version != self._version:  # invalidated while fetching
+                        continue
+                    day_points = self._points.setdefault(platform, {})
+                    for row in rows:
+                        day_points[row["date"]] = row
+                    self._held[platform] = _add_range(self._held.get(platform, []), s, e)
+
+        with self._lock:
+            day_points = self._points.get(platform, {})
+            out = []
+            d = start
+            while d <= end:
+                point = day_points.get(d.isoformat())
+                if point is not None:
+                    out.append(point)
+                d += timedelta(days=1)
+            return out
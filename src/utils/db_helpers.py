@@ -42,8 +42,8 @@ CREATE TABLE IF NOT EXISTS meta_ads_actions_daily (
 
 
 
-def init_db(db_path: str):
-    conn = sqlite3.connect(db_path)
+def init_db(db_path: str, timeout: float = 5.0):
+    conn = sqlite3.connect(db_path, timeout=timeout)
     cur = conn.cursor()
     for ddl in DDL.values():
         cur.execute(ddl)
@@ -59,4 +59,9 @@ def insert_dataframe(conn: sqlite3.Connection, table: str, df: pd.DataFrame):
     conn.executemany(sql, df.itertuples(index=False, name=None))
     conn.commit()
 
-
+def replace_dataframe(conn: sqlite3.Connection, table: str, df: pd.DataFrame):
+    conn.execute(f"DELETE FROM {table}")
+    if df.empty:
+        conn.commit()
+        return
+    insert_dataframe(conn, table, df)
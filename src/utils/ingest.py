@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+import pandas as pd
+
+# Source column aliases -> google_ads_daily column (API field names and flattened variants)
+GOOGLE_COLUMN_ALIASES = {
+    "segments_date":     ["segments.date", "segments_date", "date"],
+    "campaign_id":       ["campaign.id", "campaign_id"],
+    "campaign_name":     ["campaign.name", "campaign_name"],
+    "ad_group_id":       ["ad_group.id", "ad_group_id"],
+    "ad_group_name":     ["ad_group.name", "ad_group_name"],
+    "ad_id":             ["ad_group_ad.ad.id", "ad.id", "ad_id"],
+    "impressions":       ["metrics.impressions", "impressions"],
+    "clicks":            ["metrics.clicks", "clicks"],
+    "cost_micros":       ["metrics.cost_micros", "cost_micros"],
+    "conversions":       ["metrics.conversions", "conversions"],
+    "conversions_value": ["metrics.conversions_value", "conversions_value"],
+}
+GOOGLE_ID_COLUMNS = ["campaign_id", "ad_group_id", "ad_id"]
+
+META_CORE_COLUMNS = ["date_start", "date_stop", "campaign_id", "campaign_name",
+                     "adset_id", "adset_name", "ad_id", "impressions", "clicks", "spend"]
+META_ACTION_COLUMNS = ["date_start", "ad_id", "action_type", "value", "action_value"]
+
+def _resolve_google_columns(header: List[str]) -> Dict[str, str]:
+    present = {h.strip().lower(): h for h in header}
+    mapping = {}
+    for target, aliases in GOOGLE_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in present:
+                mapping[present[alias]] = target
+                break
+        else:
+            raise ValueError(f"Google Ads CSV is missing a column for {target!r} (tried {aliases})")
+    return mapping
+
+def _replace_dates(conn: sqlite3.Connection, deletes: Dict[str, str], dates, seen: Set[str]):
+    """Delete previously loaded rows for dates not yet seen in this load.
+
+    Pass the same `seen` set to every file of one load so a later file doesn't
+    delete what an earlier one inserted for an overlapping date.
+    """
+    new = sorted(set(dates) - seen)
+    if not new:
+        return
+    placeholders = ",".join(["?"] * len(new))
+    for table, date_col in deletes.items():
+        conn.execute(f"DELETE FROM {table} WHERE {date_col} IN ({placeholders})", new)
+    seen.update(new)
+
+def _report(log, label: str, rows: int, nbytes: int, t0: float) -> Dict[str, Any]:
+    secs = max(time.perf_counter() - t0, 1e-9)
+    stats = {
+        "rows": rows,
+        "seconds": round(secs, 3),
+        "rows_per_sec": round(rows / secs, 1),
+        "mb_per_sec": round(nbytes / secs / 1e6, 2),
+    }
+    if log:
+        log(f"{label}: {rows:,} rows in {stats['seconds']:.2f}s "
+            f"({stats['rows_per_sec']:,.0f} rows/s, {stats['mb_per_sec']:.1f} MB/s)")
+    return stats
+
+def ingest_google_csv(conn: sqlite3.Connection, path: str, chunksize: int = 100_000,
+                      replace_dates: bool = True, log: Optional[Callable[[str], None]] = print,
+                      seen: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Stream a Google Ads report CSV into google_ads_daily, one chunk per transaction."""
+    t0 = time.perf_counter()
+    header = list(pd.read_csv(path, nrows=0).columns)
+    mapping = _resolve_google_columns(header)
+    id_sources = [src for src, dst in mapping.items() if dst in GOOGLE_ID_COLUMNS]
+
+    cols = list(GOOGLE_COLUMN_ALIASES)
+    sql = f"INSERT INTO google_ads_daily ({','.join(cols)}) VALUES ({','.join(['?'] * len(cols))})"
+    rows = 0
+    seen = set() if seen is None else seen
+    reader = pd.read_csv(path, usecols=list(mapping), chunksize=chunksize,
+                         dtype={c: str for c in id_sources})
+    for chunk in reader:
+        chunk = chunk.rename(columns=mapping)
+        # Google reports fractional conversions; the schema stores whole conversions
+        chunk["conversions"] = chunk["conversions"].fillna(0).round().astype("int64")
+        chunk["conversions_value"] = chunk["conversions_value"].fillna(0).astype(float)
+        for c in ("impressions", "clicks", "cost_micros"):
+            chunk[c] = chunk[c].fillna(0).astype("int64")
+        if replace_dates:
+            _replace_dates(conn, {"google_ads_daily": "segments_date"}, chunk["segments_date"].unique(), seen)
+        conn.executemany(sql, chunk[cols].itertuples(index=False, name=None))
+        conn.commit()
+        rows += len(chunk)
+        if log:
+            log(f"  google_ads_daily: {rows:,} rows loaded")
+    return _report(log, "google_ads_daily", rows, os.path.getsize(path), t0)
+
+def _iter_json_lines(f) -> Iterator[Dict[str, Any]]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def _iter_json_array(f, read_size: int = 1 << 20) -> Iterator[Dict[str, Any]]:
+    """Yield the objects of a top-level array or of a {"data": [...]} wrapper without loading the file."""
+    decoder = json.JSONDecoder()
+    buf = f.read(read_size)
+    start = buf.lstrip()[:1]
+    if start == "{":
+        # Insights API pages: the records live under "data"
+        while True:
+            i = buf.find('"data"')
+            if i >= 0:
+                j = buf.find("[", i)
+                if j >= 0:
+                    pos = j + 1
+                    break
+            more = f.read(read_size)
+            if not more:
+                return
+            buf += more
+    elif start == "[":
+        pos = buf.index("[") + 1
+    else:
+        raise ValueError("Meta Insights JSON must be an array or an object with a 'data' array")
+
+    while True:
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf):
+                break
+            buf, pos = f.read(read_size), 0
+            if not buf:
+                return
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Object straddles the buffer boundary
+            more = f.read(read_size)
+            if not more:
+                raise
+            buf, pos = buf[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
+        if pos > read_size:
+            buf, pos = buf[pos:], 0
+
+def ingest_meta_json(conn: sqlite3.Connection, path: str, batch_size: int = 50_000,
+                     replace_dates: bool = True, log: Optional[Callable[[str], None]] = print,
+                     seen: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Stream Meta Insights records into meta_ads_daily and meta_ads_actions_daily.
+
+    Accepts JSON Lines (.jsonl/.ndjson), a top-level array, or an API page with a
+    "data" array. Core rows and flattened actions are buffered column-wise and
+    flushed every `batch_size` records.
+    """
+    t0 = time.perf_counter()
+    core_sql = (f"INSERT INTO meta_ads_daily ({','.join(META_CORE_COLUMNS)}) "
+                f"VALUES ({','.join(['?'] * len(META_CORE_COLUMNS))})")
+    action_sql = (f"INSERT INTO meta_ads_actions_daily ({','.join(META_ACTION_COLUMNS)}) "
+                  f"VALUES ({','.join(['?'] * len(META_ACTION_COLUMNS))})")
+    deletes = {"meta_ads_daily": "date_start", "meta_ads_actions_daily": "date_start"}
+
+    core = {c: [] for c in META_CORE_COLUMNS}
+    acts = {c: [] for c in META_ACTION_COLUMNS}
+    rows = action_rows = 0
+    seen = set() if seen is None else seen
+
+    def flush():
+        nonlocal rows, action_rows
+        n = len(core["ad_id"])
+        if not n:
+            return
+        if replace_dates:
+            _replace_dates(conn, deletes, core["date_start"], seen)
+        conn.executemany(core_sql, zip(*(core[c] for c in META_CORE_COLUMNS)))
+        conn.executemany(action_sql, zip(*(acts[c] for c in META_ACTION_COLUMNS)))
+        conn.commit()
+        rows += n
+        action_rows += len(acts["ad_id"])
+        for buf in (*core.values(), *acts.values()):
+            buf.clear()
+        if log:
+            log(f"  meta_ads_daily: {rows:,} rows, meta_ads_actions_daily: {action_rows:,} rows loaded")
+
+    with open(path, "r", encoding="utf-8") as f:
+        records = _iter_json_lines(f) if path.endswith((".jsonl", ".ndjson")) else _iter_json_array(f)
+        for rec in records:
+            day, ad_id = rec["date_start"], str(rec["ad_id"])
+            core["date_start"].append(day)
+            core["date_stop"].append(rec.get("date_stop") or day)
+            core["campaign_id"].append(str(rec["campaign_id"]))
+            core["campaign_name"].append(rec.get("campaign_name", ""))
+            core["adset_id"].append(str(rec["adset_id"]))
+            core["adset_name"].append(rec.get("adset_name", ""))
+            core["ad_id"].append(ad_id)
+            core["impressions"].append(int(rec.get("impressions") or 0))
+            core["clicks"].append(int(rec.get("clicks") or 0))
+            core["spend"].append(float(rec.get("spend") or 0))
+
+            actions = rec.get("actions")
+            if actions:
+                values = {a["action_type"]: a["value"] for a in rec.get("action_values") or ()}
+                for a in actions:
+                    atype = a["action_type"]
+                    acts["date_start"].append(day)
+                    acts["ad_id"].append(ad_id)
+                    acts["action_type"].append(atype)
+                    acts["value"].append(int(round(float(a["value"]))))
+                    acts["action_value"].append(float(values.get(atype, 0)))
+
+            if len(core["ad_id"]) >= batch_size:
+                flush()
+        flush()
+
+    return _report(log, "meta_ads_daily", rows, os.path.getsize(path), t0)
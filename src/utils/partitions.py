@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Raw tables per platform and the column they are partitioned on
+PLATFORM_TABLES = {
+    "google": {"google_ads_daily": "segments_date"},
+    "meta": {"meta_ads_daily": "date_start", "meta_ads_actions_daily": "date_start"},
+}
+
+# One SQLite file per (platform, month) holds that month's raw rows plus
+# rollup_daily_ad, the ad-grain daily aggregate every other rollup derives from.
+# source_rows counts the raw rows copied in, to detect loads after the build.
+CATALOG_DDL = """
+CREATE TABLE IF NOT EXISTS partition_catalog (
+  platform TEXT NOT NULL,
+  month TEXT NOT NULL,
+  path TEXT NOT NULL,
+  min_date TEXT NOT NULL,
+  max_date TEXT NOT NULL,
+  row_count INTEGER NOT NULL,
+  source_rows INTEGER,
+  frozen INTEGER NOT NULL DEFAULT 0,
+  built_at TEXT NOT NULL,
+  PRIMARY KEY (platform, month)
+);"""
+
+PARTITION_ROLLUP = "rollup_daily_ad"
+
+# Scan pools keyed by worker count. Spawned, not forked: the API process runs
+# request threads, and a forked child could inherit a lock held by one of them.
+_pools: Dict[Optional[int], ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+def partition_path(root: str, platform: str, month: str) -> Path:
+    return Path(root) / platform / f"{month}.db"
+
+def has_catalog(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'partition_catalog'"
+    ).fetchone()
+    return row is not None
+
+def ensure_catalog(conn: sqlite3.Connection):
+    conn.execute(CATALOG_DDL)
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(partition_catalog)")}
+    if "source_rows" not in cols:  # catalogs built before source_rows was tracked
+        conn.execute("ALTER TABLE partition_catalog ADD COLUMN source_rows INTEGER")
+
+def _raw_months(conn: sqlite3.Connection, platform: str) -> Dict[str, list]:
+    """month -> [min_date, max_date, raw rows] over the platform's raw tables."""
+    out: Dict[str, list] = {}
+    for i, (table, date_col) in enumerate(PLATFORM_TABLES[platform].items()):
+        sql = (f"SELECT substr({date_col}, 1, 7), MIN({date_col}), MAX({date_col}), COUNT(*) "
+               f"FROM {table} GROUP BY 1")
+        for month, mn, mx, n in conn.execute(sql):
+            acc = out.setdefault(month, [None, None, 0])
+            if i == 0:  # the first table drives the view, so its dates bound the rollup
+                acc[0], acc[1] = mn, mx
+            acc[2] += n
+    return out
+
+def stale_partitions(conn: sqlite3.Connection) -> List[Tuple[str, str, str]]:
+    """(platform, month, reason) for every month whose raw rows the catalog doesn't match."""
+    catalog = {(p, m): (mn, mx, n, frozen) for p, m, mn, mx, n, frozen in conn.execute(
+        "SELECT platform, month, min_date, max_date, source_rows, frozen FROM partition_catalog")}
+    stale = []
+    for platform in PLATFORM_TABLES:
+        raw = _raw_months(conn, platform)
+        for month in sorted(set(raw) | {m for p, m in catalog if p == platform}):
+            entry, src = catalog.get((platform, month)), raw.get(month)
+            if entry is None:
+                reason = "not partitioned"
+            elif src is None:
+                reason = "no raw rows left"
+            elif entry[2] is None:
+                reason = "source row count not recorded"
+            elif entry[2] != src[2]:
+                reason = f"{src[2]:,} raw rows, {entry[2]:,} partitioned"
+            elif (entry[0], entry[1]) != (src[0], src[1]):
+                reason = f"raw dates {src[0]}..{src[1]}, partition {entry[0]}..{entry[1]}"
+            else:
+                continue
+            if entry is not None and entry[3]:
+                reason += " (frozen)"
+            stale.append((platform, month, reason))
+    return stale
+
+def prune_partitions(conn: sqlite3.Connection, start: Optional[str], end: Optional[str],
+                     platform: str = "all", base_dir: str = ".") -> List[Tuple[str, str, str, int]]:
+    """Catalog entries (platform, month, path, frozen) overlapping [start, end].
+
+    Catalog paths are relative to the main database's directory (`base_dir`).
+    """
+    sql = """
+    SELECT platform, month, path, frozen
+    FROM partition_catalog
+    WHERE (? IS NULL OR max_date >= ?)
+      AND (? IS NULL OR min_date <= ?)
+      AND (? = 'all' OR platform = ?)
+    ORDER BY month, platform;
+    """
+    rows = conn.execute(sql, [start, start, end, end, platform, platform]).fetchall()
+    return [(plat, month, str(Path(base_dir) / path), frozen) for plat, month, path, frozen in rows]
+
+def open_partition(path: str, frozen: bool = False) -> sqlite3.Connection:
+    # Frozen partitions never change, so SQLite can skip locking and change detection
+    uri = f"file:{path}?immutable=1" if frozen else f"file:{path}?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+def _scan_one(path: str, frozen: bool, sql: str, params: Sequence[Any]) -> List[tuple]:
+    conn = open_partition(path, frozen)
+    try:
+        return conn.execute(sql, list(params)).fetchall()
+    finally:
+        conn.close()
+
+def start_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        _pools.clear()
+
+def fan_out(parts: Sequence[Tuple[str, str, str, int]], sql: str, params: Sequence[Any],
+            workers: Optional[int] = None) -> List[List[tuple]]:
+    """Run `sql` on every partition in parallel processes; one row list per partition."""
+    if not parts:
+        return []
+    if len(parts) == 1:
+        _, _, path, frozen = parts[0]
+        return [_scan_one(path, bool(frozen), sql, params)]
+    pool = start_pool(workers)
+    futures = [pool.submit(_scan_one, path, bool(frozen), sql, params) for _, _, path, frozen in parts]
+    return [f.result() for f in futures]
+
+def iter_fan_out(parts: Sequence[Tuple[str, str, str, int]], sql: str, params: Sequence[Any],
+                 workers: Optional[int] = None) -> Iterator[List[tuple]]:
+    """Like fan_out, but yields each partition's rows as it finishes (in completion order).
+
+    At most `workers` partitions are in flight, so the caller only ever holds a
+    few partitions' rows no matter how much history there is.
+    """
+    pool = start_pool(workers)
+    todo = list(parts)
+    in_flight = set()
+    limit = workers or os.cpu_count() or 1
+    while todo or in_flight:
+        while todo and len(in_flight) < limit:
+            _, _, path, frozen = todo.pop(0)
+            in_flight.add(pool.submit(_scan_one, path, bool(frozen), sql, params))
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for fut in done:
+            yield fut.result()
+
+def merge_sums(partials: Sequence[Sequence[tuple]], n_keys: int) -> Dict[tuple, List[float]]:
+    """Merge partial aggregates: rows are key columns followed by additive measures."""
+    merged: Dict[tuple, List[float]] = {}
+    for rows in partials:
+        for r in rows:
+            key, vals = r[:n_keys], r[n_keys:]
+            acc = merged.get(key)
+            if acc is None:
+                merged[key] = [v or 0 for v in vals]
+            else:
+                for i, v in enumerate(vals):
+                    acc[i] += v or 0
+    return merged
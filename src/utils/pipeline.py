@@ -0,0 +1,152 @@
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+# A stage is a dict:
+#   fn       top-level callable taking the run context (must be picklable)
+#   deps     upstream stage names
+#   params   context keys the stage depends on
+#   sources  files (relative to src/) whose contents feed the fingerprint
+#   outputs  callable(ctx) -> paths that must exist for a skip to be valid
+#   writes   tables the stage replaces; each table's state slot records the last
+#            writer, so a skip is invalid once another stage has written the table
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(name: str, stage: Dict[str, Any], ctx: Dict[str, Any], upstream: Dict[str, str]) -> str:
+    payload = {
+        "stage": name,
+        "params": {k: ctx[k] for k in stage.get("params", [])},
+        "sources": {s: _file_digest(SRC_DIR / s) for s in stage.get("sources", [])},
+        "upstream": {d: upstream[d] for d in stage.get("deps", [])},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def _topo_order(stages: Dict[str, Dict[str, Any]]) -> List[str]:
+    order, seen = [], set()
+    def visit(n, stack=()):
+        if n in stack:
+            raise ValueError(f"cycle in pipeline at stage {n!r}")
+        if n in seen:
+            return
+        for d in stages[n].get("deps", []):
+            visit(d, stack + (n,))
+        seen.add(n)
+        order.append(n)
+    for n in stages:
+        visit(n)
+    return order
+
+def _load_state(path: Path) -> Dict[str, str]:
+    if path.exists():
+        return json.loads(path.read_text())
+    return {}
+
+def run_dag(stages: Dict[str, Dict[str, Any]], ctx: Dict[str, Any], state_path: str, log_path: str,
+            max_workers: int = 2, force: bool = False) -> Dict[str, Any]:
+    """Run stages in dependency order, independent branches in parallel processes.
+
+    A stage whose fingerprint matches the last successful run (and whose outputs
+    still exist) is skipped. The run summary is appended to `log_path` as JSON.
+    """
+    state_file, log_file = Path(state_path), Path(log_path)
+    state = _load_state(state_file)
+    order = _topo_order(stages)
+
+    # Fingerprints only depend on inputs, so they can all be computed up front
+    prints: Dict[str, str] = {}
+    for n in order:
+        prints[n] = fingerprint(n, stages[n], ctx, prints)
+
+    # Checked before anything runs: a stage may create another stage's outputs
+    outputs_present = {}
+    for n in order:
+        outputs = stages[n].get("outputs")
+        outputs_present[n] = all(Path(p).exists() for p in (outputs(ctx) if outputs else []))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    started_at = datetime.now(timezone.utc).isoformat()
+    run_t0 = time.perf_counter()
+
+    def _ready(n):
+        return n not in results and all(results.get(d, {}).get("status") in ("ran", "skipped")
+                                        for d in stages[n].get("deps", []))
+
+    def _blocked(n):
+        return any(results.get(d, {}).get("status") in ("failed", "blocked")
+                   for d in stages[n].get("deps", []))
+
+    def _can_skip(n):
+        if force or state.get(n) != prints[n]:
+            return False
+        # A rerun upstream means this stage's inputs were rebuilt
+        if any(results[d]["status"] == "ran" for d in stages[n].get("deps", [])):
+            return False
+        # Another stage (e.g. an ingest replacing a load) wrote the table since
+        if any(state.get(f"table:{t}") != prints[n] for t in stages[n].get("writes", [])):
+            return False
+        return outputs_present[n]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while len(results) < len(order):
+            progressed = False
+            for n in order:
+                if n in results or n in running.values():
+                    continue
+                if _blocked(n):
+                    results[n] = {"status": "blocked", "seconds": 0.0}
+                    progressed = True
+                elif _ready(n):
+                    if _can_skip(n):
+                        results[n] = {"status": "skipped", "seconds": 0.0}
+                        progressed = True
+                    else:
+                        running[pool.submit(_timed, stages[n]["fn"], ctx)] = n
+            if progressed:
+                continue
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                n = running.pop(fut)
+                try:
+                    seconds = fut.result()
+                    results[n] = {"status": "ran", "seconds": round(seconds, 3)}
+                    state[n] = prints[n]
+                    for t in stages[n].get("writes", []):
+                        state[f"table:{t}"] = prints[n]
+                except Exception as e:
+                    results[n] = {"status": "failed", "seconds": 0.0, "error": f"{type(e).__name__}: {e}"}
+                    state.pop(n, None)
+                    for t in stages[n].get("writes", []):
+                        state.pop(f"table:{t}", None)
+                state_file.parent.mkdir(parents=True, exist_ok=True)
+                state_file.write_text(json.dumps(state, indent=2, sort_keys=True))
+
+    run = {
+        "started_at": started_at,
+        "seconds": round(time.perf_counter() - run_t0, 3),
+        "ok": all(r["status"] in ("ran", "skipped") for r in results.values()),
+        "stages": {n: results[n] for n in order},
+    }
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_file, "a") as f:
+        f.write(json.dumps(run) + "\n")
+    return run
+
+def _timed(fn, ctx) -> float:
+    t0 = time.perf_counter()
+    fn(ctx)
+    return time.perf_counter() - t0